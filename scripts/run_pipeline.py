@@ -185,6 +185,9 @@ def run_pipeline(args):
             print("STEP 6: Generating Visualizations")
             print("="*70)
             
+            # Plots are only written to files; no GUI backend needed
+            import matplotlib
+            matplotlib.use('Agg')
             from src.visualization.map_plotter import MapPlotter, StatisticsPlotter
             
             # Maps
@@ -211,11 +214,13 @@ def run_pipeline(args):
             print("Creating distribution plots...")
             stats_plotter.plot_walkscore_distribution(
                 baseline_scores,
+                baseline_stats,
                 "results/plots/baseline_distribution.png"
             )
             
             stats_plotter.plot_walkscore_distribution(
                 optimized_scores,
+                optimized_stats,
                 "results/plots/optimized_distribution.png"
             )
             
@@ -223,6 +228,8 @@ def run_pipeline(args):
             stats_plotter.plot_comparison(
                 baseline_scores,
                 optimized_scores,
+                baseline_stats,
+                optimized_stats,
                 "results/plots/comparison.png"
             )
             
@@ -4,12 +4,12 @@ Uses Google OR-Tools CP-SAT solver.
 
 This is an alternative to MILP, often faster for discrete optimization problems.
 """
+import os
 from typing import Dict, Set, List
-import yaml
 from sqlalchemy import text
 from src.network.pedestrian_graph import PedestrianGraph
 from src.scoring.walkscore import WalkScoreCalculator
-from src.utils.database import get_db_manager
+from src.utils.database import get_db_manager, load_config
 
 
 class CPOptimizer:
@@ -29,8 +29,7 @@ class CPOptimizer:
         self.db = graph.db
         
         # Load configuration
-        with open("config.yaml", 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config("config.yaml")
         
         # Try to import OR-Tools
         try:
@@ -71,14 +70,17 @@ class CPOptimizer:
         # Create model
         model = self.cp_model.CpModel()
         
-        # Get candidate capacities
-        candidate_capacities = {}
-        for candidate_id in self.graph.M:
-            with self.db.get_session() as session:
-                query = "SELECT capacity FROM candidate_locations WHERE node_id = :node_id"
-                result = session.execute(text(query), {'node_id': candidate_id})
-                capacity = result.scalar()
-                candidate_capacities[candidate_id] = capacity if capacity else 1
+        # Get candidate capacities (one query for all candidates)
+        with self.db.get_session() as session:
+            query = "SELECT node_id, capacity FROM candidate_locations"
+            result = session.execute(text(query))
+            db_capacities = {}
+            for node_id, capacity in result:
+                db_capacities.setdefault(node_id, capacity)
+        candidate_capacities = {
+            candidate_id: db_capacities.get(candidate_id) or 1
+            for candidate_id in self.graph.M
+        }
         
         print("\n[1/4] Creating decision variables...")
         # Decision variables: y_ja (boolean)
@@ -109,12 +111,14 @@ class CPOptimizer:
         # We'll use a linear approximation of WalkScore improvement
         
         # Precompute potential improvements for each allocation
-        improvements = {}
         print("  Precomputing improvement estimates...")
         
-        for idx, (candidate_id, a_type) in enumerate(y.keys()):
+        # Coverage does not depend on the amenity type: count each candidate
+        # once and share the coefficient across all types
+        coverage = {}
+        for idx, candidate_id in enumerate(self.graph.M):
             if idx % 100 == 0:
-                print(f"    Progress: {idx}/{len(y)}", end='\r')
+                print(f"    Progress: {idx}/{len(self.graph.M)}", end='\r')
             
             # Estimate improvement: count residentials within walking distance
             count = 0
@@ -124,7 +128,12 @@ class CPOptimizer:
                     count += 1
             
             # Scale to integer (CP-SAT requires integer coefficients)
-            improvements[(candidate_id, a_type)] = int(count * 1000)
+            coverage[candidate_id] = int(count * 1000)
+        
+        improvements = {
+            (candidate_id, a_type): coverage[candidate_id]
+            for (candidate_id, a_type) in y.keys()
+        }
         
         print()
         
@@ -137,10 +146,12 @@ class CPOptimizer:
         print("  Objective: Maximize coverage-based improvement")
         
         print("\n[4/4] Solving CP-SAT...")
+        cp_config = self.config['optimization'].get('cp') or {}
         solver = self.cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 3600  # 1 hour
-        solver.parameters.num_search_workers = 8  # Parallel search
-        solver.parameters.log_search_progress = True
+        solver.parameters.max_time_in_seconds = cp_config.get('time_limit_seconds', 3600)
+        # Parallel search on every core unless configured
+        solver.parameters.num_workers = cp_config.get('threads') or os.cpu_count() or 8
+        solver.parameters.log_search_progress = cp_config.get('log_search_progress', True)
         
         status = solver.Solve(model)
         
@@ -7,10 +7,11 @@ Key fixes:
 2. NO candidate limiting - uses ALL candidates
 3. Exact objective computation
 """
+import numpy as np
 from typing import Dict, Set, Tuple, List
 from src.network.pedestrian_graph import PedestrianGraph
 from src.scoring.walkscore import WalkScoreCalculator
-from src.utils.database import get_db_manager
+from src.utils.database import get_db_manager, load_config
 from sqlalchemy import text
 
 
@@ -32,9 +33,7 @@ class GreedyOptimizer:
         self.db = graph.db
         
         # Load configuration
-        import yaml
-        with open("config.yaml", 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config("config.yaml")
         
         self.max_amenities = self.config['optimization']['max_amenities_per_type']
         self.default_k = self.config['optimization']['default_k']
@@ -50,6 +49,9 @@ class GreedyOptimizer:
         
         # Pre-compute nearby residentials for each candidate - CRITICAL for speed!
         self.nearby_residentials = {}  # {candidate_id: set of residential_ids within 3km}
+        
+        # Number of residential buildings snapped to each network node
+        self.buildings_per_node = {}  # {snapped_node_id: building count}
     
     def optimize(self, k: int = None, amenity_types: List[str] = None, record_demo: bool = False) -> Dict[str, Set[int]]:
         """
@@ -127,17 +129,25 @@ class GreedyOptimizer:
 
         print(f"Using ALL {len(all_candidates)} candidates (no sampling)")
 
+        # One query for all capacities instead of one per candidate
+        with self.db.get_session() as session:
+            query = "SELECT node_id, capacity FROM candidate_locations"
+            result = session.execute(text(query))
+            db_capacities = {}
+            for node_id, capacity in result:
+                db_capacities.setdefault(node_id, capacity)
+        
         for candidate_id in all_candidates:
-            with self.db.get_session() as session:
-                query = "SELECT capacity FROM candidate_locations WHERE node_id = :node_id"
-                result = session.execute(text(query), {'node_id': candidate_id})
-                capacity = result.scalar()
-                candidate_capacities[candidate_id] = capacity if capacity else 1
+            candidate_capacities[candidate_id] = db_capacities.get(candidate_id) or 1
         
         # Greedy iteration
         iteration = 0
         total_allocations = sum(k for _ in amenity_types)
         
+        # Every full objective evaluation (checkpoints + final), checked once at the end
+        objectives = np.empty(total_allocations + 1, dtype=np.float64)
+        n_objectives = 0
+        
         # Track start time for global ETA
         import time 
         start_time_global = time.time()
@@ -259,10 +269,14 @@ class GreedyOptimizer:
             # Calculate current objective every 5 iterations (or every iteration if recording)
             if record_demo:
                 current_obj = self._calculate_objective(S)
+                objectives[n_objectives] = current_obj
+                n_objectives += 1
                 # Record to database
                 recorder.record_iteration(a_type, candidate_id, best_increase, current_obj)
             elif iteration % 5 == 0:
                 current_obj = self._calculate_objective(S)
+                objectives[n_objectives] = current_obj
+                n_objectives += 1
                 print(f"    Current avg WalkScore = {current_obj:.4f}")
         
         print(f"\nOptimization completed after {iteration} iterations")
@@ -271,6 +285,11 @@ class GreedyOptimizer:
         # Calculate final objective
         final_obj = self._calculate_objective(S)
         print(f"Final average WalkScore: {final_obj:.4f}")
+        objectives[n_objectives] = final_obj
+        n_objectives += 1
+        
+        # Greedy invariant: adding amenities never lowers the objective
+        assert np.all(np.diff(objectives[:n_objectives]) >= 0), objectives[:n_objectives]
         
         # Finalize recording if enabled
         if recorder:
@@ -309,34 +328,30 @@ class GreedyOptimizer:
         if not affected_network_nodes:
             return 0.0
         
-        # Create new solution with added allocation
-        new_S = {}
-        for a_type, locations in current_S.items():
-            new_S[a_type] = locations.copy()
-        
-        if amenity_type not in new_S:
-            new_S[amenity_type] = set()
-        new_S[amenity_type].add(candidate_id)
+        # Create new solution with added allocation: only the changed type gets
+        # a new set, the other types share current_S's (read-only) sets
+        new_S = dict(current_S)
+        new_S[amenity_type] = current_S.get(amenity_type, set()) | {candidate_id}
         
         # ✅ CRITICAL FIX: Calculate improvement for ALL buildings that snap to affected nodes
         # Multiple buildings can snap to the same network node!
+        # They all share that node's WalkScore, so score each node once and
+        # weight its change by the number of buildings snapped to it
         total_improvement = 0.0
         
-        # Find all buildings that snap to affected network nodes
-        affected_buildings = [
-            (res_id, snap_id) for res_id, snap_id in self.graph.residential_buildings
-            if snap_id in affected_network_nodes
-        ]
-        
-        for residential_id, snapped_node_id in affected_buildings:
+        for snapped_node_id in affected_network_nodes:
+            n_buildings = self.buildings_per_node.get(snapped_node_id, 0)
+            if n_buildings == 0:
+                continue
+            
             # Current WalkScore (from cache, using network node!)
             old_score = self.walkscore_cache[snapped_node_id]
             
             # New WalkScore with added amenity
             new_score = self.scorer.compute_walkscore(snapped_node_id, new_S)
             
-            # Improvement for this building
-            total_improvement += (new_score - old_score)
+            # Improvement for all buildings on this node
+            total_improvement += n_buildings * (new_score - old_score)
         
         # Average improvement across ALL residential BUILDINGS (not just affected network nodes!)
         # This is correct because unaffected residentials have 0 improvement
@@ -392,6 +407,10 @@ class GreedyOptimizer:
         max_relevant_distance = 3000.0
         self.nearby_residentials = {}
         
+        self.buildings_per_node = {}
+        for _, snapped_node_id in self.graph.residential_buildings:
+            self.buildings_per_node[snapped_node_id] = self.buildings_per_node.get(snapped_node_id, 0) + 1
+        
         total = len(self.graph.M)
         for idx, candidate_id in enumerate(self.graph.M, 1):
             nearby = []
@@ -521,15 +540,17 @@ class GreedyOptimizer:
                         })
             
             # Save WalkScores for ALL buildings
-            scores = {}
             weighted_distances = {}
             for residential_id, snapped_node_id in self.graph.residential_buildings:
                 # Use snapped_node_id for pathfinding
-                weighted_dist = self.scorer.compute_weighted_distance(snapped_node_id, solution)
-                score = self.scorer.piecewise_linear_score(weighted_dist)
                 # Store with residential_id (building ID)
-                scores[residential_id] = score
-                weighted_distances[residential_id] = weighted_dist
+                weighted_distances[residential_id] = self.scorer.compute_weighted_distance(
+                    snapped_node_id, solution
+                )
+            
+            # Score every building in one vectorized PWL call
+            score_values = self.scorer.piecewise_linear_scores(list(weighted_distances.values()))
+            scores = dict(zip(weighted_distances.keys(), score_values.tolist()))
             
             self.scorer._save_scores_to_db(scores, weighted_distances, scenario=scenario)
         
@@ -2,18 +2,25 @@
 Helpers to define Balıkesir city center (Karesi + Altıeylül) polygon.
 This is used to restrict all analysis to the true city center.
 """
+import threading
 import osmnx as ox
 from shapely.ops import unary_union
 
 
+# Geocoded once per process (two Nominatim requests); shapely geometries are immutable
+_center_polygon = None
+_center_polygon_lock = threading.Lock()
+
+
 def get_balikesir_center_polygon():
     """
     Returns a Shapely Polygon/MultiPolygon representing
     Karesi + Altıeylül (Balıkesir city center).
     """
-    places = ["Karesi, Balıkesir, Türkiye", "Altıeylül, Balıkesir, Türkiye"]
-    gdfs = [ox.geocode_to_gdf(p).to_crs(4326) for p in places]
-    center_poly = unary_union([g.geometry.iloc[0] for g in gdfs])
-    return center_poly
-
-
+    global _center_polygon
+    with _center_polygon_lock:
+        if _center_polygon is None:
+            places = ["Karesi, Balıkesir, Türkiye", "Altıeylül, Balıkesir, Türkiye"]
+            gdfs = [ox.geocode_to_gdf(p).to_crs(4326) for p in places]
+            _center_polygon = unary_union([g.geometry.iloc[0] for g in gdfs])
+    return _center_polygon
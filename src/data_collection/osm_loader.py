@@ -18,7 +18,6 @@ import pandas as pd
 import numpy as np
 from shapely.geometry import Point
 from typing import Dict, List, Tuple, Optional, Set
-import yaml
 from sqlalchemy import text
 import sys
 import time
@@ -27,7 +26,7 @@ import itertools
 from datetime import datetime
 import logging
 
-from src.utils.database import get_db_manager
+from src.utils.database import get_db_manager, load_config
 from src.data_collection.balikesir_center import get_balikesir_center_polygon
 
 # Set up logging
@@ -42,15 +41,14 @@ class OSMDataLoader:
     """Loads OSM data for walkability optimization with enhanced quality controls."""
 
     # Class-level defaults (will be overridden by config)
-    RESIDENTIAL_BUILDING_TYPES = set()
+    RESIDENTIAL_BUILDING_TYPES = frozenset()
     MAX_SNAPPING_DISTANCE = 500  # Default, will be overridden by config
     DUPLICATE_THRESHOLD = 1.0
     AMENITY_DUPLICATE_THRESHOLD = 5.0
     
     def __init__(self, config_path: str = "config.yaml"):
         """Initialize OSM loader with configuration."""
-        with open(config_path, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config(config_path)
         
         self.balikesir_config = self.config['balikesir']
         self.osm_config = self.config['osm']
@@ -64,6 +62,10 @@ class OSMDataLoader:
         self.amenity_poly = self.center_poly.buffer(
             0.015)  # ~1.5km buffer in degrees (~1650m)
 
+        # OSMnx tag dicts derived from config, built once per loader
+        self._amenity_tags_cache: Dict[str, Dict] = {}
+        self._candidate_tags_cache: Optional[List[Dict]] = None
+
         # Load residential building types from config
         self._load_residential_types_from_config()
 
@@ -99,16 +101,19 @@ class OSMDataLoader:
     def _load_residential_types_from_config(self):
         """Extract residential building types from config."""
         residential_tags = self.osm_config.get('residential_tags', [])
-        self.RESIDENTIAL_BUILDING_TYPES = set()
+        building_types = set()
 
         for tag_dict in residential_tags:
             for key, value in tag_dict.items():
                 if key == 'building' and value != 'yes':
                     # Extract building type value
-                    self.RESIDENTIAL_BUILDING_TYPES.add(value)
+                    building_types.add(value)
                 elif key == 'building' and value == 'yes':
                     # Special case for generic building
-                    self.RESIDENTIAL_BUILDING_TYPES.add('yes')
+                    building_types.add('yes')
+
+        # Frozen once: only used for membership checks
+        self.RESIDENTIAL_BUILDING_TYPES = frozenset(building_types)
 
         logger.info(
             f"Loaded {len(self.RESIDENTIAL_BUILDING_TYPES)} residential building types from config")
@@ -175,9 +180,8 @@ class OSMDataLoader:
             import networkx as nx
             if not nx.is_strongly_connected(G):
                 logger.warning("Pedestrian network is not strongly connected")
-                logger.info(
-    f"Network has {
-        nx.number_strongly_connected_components(G)} strongly connected components")
+                logger.info("Network has %d strongly connected components",
+                            nx.number_strongly_connected_components(G))
                 self.stats['data_quality_issues'].append(
                     "Network not strongly connected")
 
@@ -284,7 +288,7 @@ class OSMDataLoader:
                 mask = pd.Series([True] * len(gdf), index=gdf.index)
 
                 # Exclude by building type
-            if bcol is not None:
+                if bcol is not None:
                     mask &= ~bcol.isin(non_residential_types)
 
                 # Exclude by amenity tag - IMPORTANT!
@@ -303,9 +307,8 @@ class OSMDataLoader:
                 # Include locations with landuse=residential
                 residential_landuse = gdf[landuse_col == "residential"]
                 if len(residential_landuse) > 0:
-                    logger.info(
-    f"Found {
-        len(residential_landuse)} residential landuse areas")
+                    logger.info("Found %d residential landuse areas",
+                                len(residential_landuse))
                     gdf = pd.concat([gdf, residential_landuse]
                                     ).drop_duplicates()
 
@@ -337,26 +340,37 @@ class OSMDataLoader:
      exc_info=True)
             return pd.DataFrame()
     
+    def _coordinates_in_bounds(self, lonlat: np.ndarray) -> np.ndarray:
+        """
+        Check which coordinates fall within the configured boundary.
+
+        Args:
+            lonlat: (N, 2) float array of [lon, lat] rows (NaN = missing)
+
+        Returns:
+            Boolean mask of length N
+        """
+        boundary = self.balikesir_config['boundary']
+        lons = lonlat[:, 0]
+        lats = lonlat[:, 1]
+        return np.logical_and.reduce([
+            lons >= boundary['west'],
+            lons <= boundary['east'],
+            lats >= boundary['south'],
+            lats <= boundary['north'],
+        ])
+
     def _validate_coordinates(self, gdf: pd.DataFrame) -> pd.DataFrame:
         """Validate that coordinates are within expected bounds."""
         if len(gdf) == 0:
             return gdf
 
-        boundary = self.balikesir_config['boundary']
-
-        # Extract coordinates safely
-        lats = gdf.geometry.apply(lambda geom: geom.y if geom else None)
-        lons = gdf.geometry.apply(lambda geom: geom.x if geom else None)
-
-        # Filter coordinates within bounds
-        valid_mask = (
-            (lats >= boundary['south']) &
-            (lats <= boundary['north']) &
-            (lons >= boundary['west']) &
-            (lons <= boundary['east'])
-        )
+        # Vectorized point coordinates (missing geometries become NaN and fail the check)
+        lonlat = np.column_stack([gdf.geometry.x.to_numpy(dtype=np.float64),
+                                  gdf.geometry.y.to_numpy(dtype=np.float64)])
+        valid_mask = self._coordinates_in_bounds(lonlat)
 
-        invalid_count = (~valid_mask).sum()
+        invalid_count = int((~valid_mask).sum())
         if invalid_count > 0:
             logger.warning(
     f"Removed {invalid_count} locations with invalid coordinates")
@@ -452,10 +466,15 @@ class OSMDataLoader:
         Converts config list format to OSMnx-compatible dict format.
         
         IMPORTANT: Converts boolean True to "yes" for OSM compatibility.
+        Results are cached per amenity type for the lifetime of the loader.
         """
+        if amenity_type in self._amenity_tags_cache:
+            return self._amenity_tags_cache[amenity_type]
+
         amenity_tags = self.osm_config.get('amenity_tags', {})
         if amenity_type not in amenity_tags:
-            return {}
+            self._amenity_tags_cache[amenity_type] = {}
+            return self._amenity_tags_cache[amenity_type]
 
         # Convert list of tag dicts to OSMnx format
         # Example: [{"shop": "supermarket"}, {"shop": "convenience"}]
@@ -489,6 +508,7 @@ class OSMDataLoader:
                 else:
                     osm_tags[key].append(str(value))
 
+        self._amenity_tags_cache[amenity_type] = osm_tags
         return osm_tags
     
     def load_candidate_locations(self) -> pd.DataFrame:
@@ -504,29 +524,37 @@ class OSMDataLoader:
         logger.info("Loading candidate locations from OSM...")
 
         # Get candidate tags from config
-        candidate_tags = self._get_candidate_tags_from_config()
+        tag_groups = self._get_candidate_tags_from_config()
+
+        # Groups have distinct keys, and OSMnx ORs all keys/values of one tags
+        # dict, so their union fetches every candidate in a single Overpass query
+        # (and without the same feature coming back once per matching group)
+        union_tags = {}
+        for group in tag_groups:
+            union_tags.update(group)
 
         all_gdfs = []
 
-        # Try to load candidates for each tag type
-        # Use expanded polygon for candidates too
-        for tags in candidate_tags:
-            try:
+        try:
+            gdf = self._fetch_candidate_features(union_tags)
+            if len(gdf) > 0:
+                all_gdfs.append(gdf)
+                logger.info(f"Found {len(gdf)} candidates for tags: {union_tags}")
+        except Exception as e:
+            # Fall back to one query per group so a failure only loses that group
+            logger.warning("Combined candidate query failed (%s); "
+                           "querying %d tag groups separately", e, len(tag_groups))
+            for tags in tag_groups:
                 try:
-                    gdf = ox.features_from_polygon(
-                        self.amenity_poly, tags=tags)
-                except AttributeError:
-                    gdf = ox.geometries_from_polygon(
-                        self.amenity_poly, tags=tags)
+                    gdf = self._fetch_candidate_features(tags)
+                except Exception as e:
+                    logger.warning("Could not load candidates for tags %s: %s", tags, e)
+                    continue
 
                 if len(gdf) > 0:
                     all_gdfs.append(gdf)
                     logger.info(f"Found {len(gdf)} candidates for tags: {tags}")
 
-        except Exception as e:
-                logger.debug(f"No candidates found for tags {tags}: {e}")
-                continue
-
         if not all_gdfs:
             logger.warning("No candidate locations found")
             return pd.DataFrame()
@@ -555,11 +583,21 @@ class OSMDataLoader:
 
         return gdf
 
+    def _fetch_candidate_features(self, tags: Dict) -> pd.DataFrame:
+        """Fetch OSM features matching tags (expanded polygon, like amenities)."""
+        try:
+            return ox.features_from_polygon(self.amenity_poly, tags=tags)
+        except AttributeError:
+            return ox.geometries_from_polygon(self.amenity_poly, tags=tags)
+
     def _get_candidate_tags_from_config(self) -> List[Dict]:
         """
         Extract candidate location tags from config.
-        Returns a list of tag dictionaries for OSMnx.
+        Returns a list of tag dictionaries for OSMnx (built once per loader).
         """
+        if self._candidate_tags_cache is not None:
+            return self._candidate_tags_cache
+
         candidate_tags_list = self.osm_config.get('candidate_tags', [])
 
         # Group tags by key
@@ -582,7 +620,8 @@ class OSMDataLoader:
             else:
                 result.append({key: values})
 
-        return result if result else [{"amenity": "parking"}]  # Fallback
+        self._candidate_tags_cache = result if result else [{"amenity": "parking"}]  # Fallback
+        return self._candidate_tags_cache
     
     def save_network_to_db(self, G: ox.graph):
         """
@@ -599,61 +638,61 @@ class OSMDataLoader:
         edges_saved = 0
 
         try:
-        with self.db.get_session() as session:
-            # Insert nodes
-            nodes_data = []
-            for node_id, data in G.nodes(data=True):
-                lat = data.get('y', 0)
-                lon = data.get('x', 0)
+            with self.db.get_session() as session:
+                # Insert nodes
+                nodes_data = []
+                for node_id, data in G.nodes(data=True):
+                    lat = data.get('y', 0)
+                    lon = data.get('x', 0)
+                    
+                    nodes_data.append({
+                        'osm_id': node_id,
+                        'node_type': 'network',
+                        'latitude': lat,
+                        'longitude': lon
+                    })
                 
-                nodes_data.append({
-                    'osm_id': node_id,
-                    'node_type': 'network',
-                    'latitude': lat,
-                    'longitude': lon
-                })
-            
                 # Batch insert nodes
                 logger.info(f"Inserting {len(nodes_data)} nodes...")
-            for node_data in nodes_data:
-                query = """
-                    INSERT INTO nodes (osm_id, node_type, latitude, longitude, geom)
-                    VALUES (:osm_id, :node_type, :latitude, :longitude, 
-                            ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326))
-                    ON CONFLICT (osm_id) DO NOTHING
-                """
-                session.execute(text(query), node_data)
+                for node_data in nodes_data:
+                    query = """
+                        INSERT INTO nodes (osm_id, node_type, latitude, longitude, geom)
+                        VALUES (:osm_id, :node_type, :latitude, :longitude, 
+                                ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326))
+                        ON CONFLICT (osm_id) DO NOTHING
+                    """
+                    session.execute(text(query), node_data)
                     nodes_saved += 1
-            
-            # Insert edges
-            edges_data = []
-            for u, v, data in G.edges(data=True):
-                # Ensure plain float (avoid np.float64 showing up in SQL)
-                raw_length = data.get('length', 0) or 0.0
-                length = float(raw_length)
-                edges_data.append({
-                    'from_osm_id': u,
-                    'to_osm_id': v,
-                    'length_meters': length
-                })
-            
-            # Batch insert edges
+                
+                # Insert edges
+                edges_data = []
+                for u, v, data in G.edges(data=True):
+                    # Ensure plain float (avoid np.float64 showing up in SQL)
+                    raw_length = data.get('length', 0) or 0.0
+                    length = float(raw_length)
+                    edges_data.append({
+                        'from_osm_id': u,
+                        'to_osm_id': v,
+                        'length_meters': length
+                    })
+                
+                # Batch insert edges
                 logger.info(f"Inserting {len(edges_data)} edges...")
                 for edge_data in edges_data:
-                query = """
-                    INSERT INTO edges (from_node_id, to_node_id, length_meters)
-                    SELECT 
-                        (SELECT node_id FROM nodes WHERE osm_id = :from_osm_id),
-                        (SELECT node_id FROM nodes WHERE osm_id = :to_osm_id),
-                        :length_meters
-                    WHERE EXISTS (SELECT 1 FROM nodes WHERE osm_id = :from_osm_id)
-                      AND EXISTS (SELECT 1 FROM nodes WHERE osm_id = :to_osm_id)
-                    ON CONFLICT (from_node_id, to_node_id) DO NOTHING
-                """
-                session.execute(text(query), edge_data)
+                    query = """
+                        INSERT INTO edges (from_node_id, to_node_id, length_meters)
+                        SELECT 
+                            (SELECT node_id FROM nodes WHERE osm_id = :from_osm_id),
+                            (SELECT node_id FROM nodes WHERE osm_id = :to_osm_id),
+                            :length_meters
+                        WHERE EXISTS (SELECT 1 FROM nodes WHERE osm_id = :from_osm_id)
+                          AND EXISTS (SELECT 1 FROM nodes WHERE osm_id = :to_osm_id)
+                        ON CONFLICT (from_node_id, to_node_id) DO NOTHING
+                    """
+                    session.execute(text(query), edge_data)
                     edges_saved += 1
 
-                logger.info(f"Network saved: {nodes_saved} nodes, {edges_saved} edges")
+            logger.info(f"Network saved: {nodes_saved} nodes, {edges_saved} edges")
 
         except Exception as e:
             logger.error(f"Error saving network to database: {e}", exc_info=True)
@@ -687,10 +726,8 @@ class OSMDataLoader:
             else:
                 components = list(nx.connected_components(G))
                 largest = max(components, key=len)
-                logger.info(
-    f"Graph has {
-        len(components)} components. Largest: {
-            len(largest)} nodes")
+                logger.info("Graph has %d components. Largest: %d nodes",
+                            len(components), len(largest))
                 return largest
 
     def _find_nearest_network_node(
@@ -725,6 +762,51 @@ class OSMDataLoader:
             if row and row[1] <= self.MAX_SNAPPING_DISTANCE:
                 return row[0]
             return None
+
+    def _snap_to_network(self, lats: np.ndarray, lons: np.ndarray,
+                         valid_nodes: set) -> Optional[List[Optional[int]]]:
+        """
+        Snap many coordinates to their nearest node in valid_nodes at once.
+
+        Builds a KD-tree over the valid network nodes (local metric projection,
+        accurate at city scale) and queries all points in a single call. Points
+        farther than MAX_SNAPPING_DISTANCE get None.
+
+        Returns:
+            Snapped node_id (or None) per point, or None if scipy is unavailable
+            (callers then fall back to _find_nearest_network_node per point)
+        """
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            logger.warning("scipy not available, snapping locations one by one via PostGIS")
+            return None
+
+        with self.db.get_session() as session:
+            query = "SELECT node_id, latitude, longitude FROM nodes WHERE node_type = 'network'"
+            rows = [row for row in session.execute(text(query)) if row[0] in valid_nodes]
+
+        snapped = [None] * len(lats)
+        if not rows:
+            return snapped
+
+        node_ids = [row[0] for row in rows]
+        node_latlon = np.array([(row[1], row[2]) for row in rows], dtype=np.float64)
+
+        # Degrees -> meters (equirectangular around the network's mean latitude)
+        lat0 = np.radians(node_latlon[:, 0].mean())
+        scale = np.array([111320.0, 111320.0 * np.cos(lat0)])
+        tree = cKDTree(node_latlon * scale)
+
+        points = np.column_stack([lats, lons]).astype(np.float64)
+        finite = np.isfinite(points).all(axis=1)
+        dists, idx = tree.query(points[finite] * scale,
+                                distance_upper_bound=self.MAX_SNAPPING_DISTANCE)
+
+        for pos, dist, j in zip(np.flatnonzero(finite), dists, idx):
+            if np.isfinite(dist):
+                snapped[pos] = node_ids[j]
+        return snapped
     
     def save_locations_to_db(self, gdf: pd.DataFrame, location_type: str, 
                             amenity_type: str = None):
@@ -737,20 +819,24 @@ class OSMDataLoader:
         - Error handling
         - Progress tracking
         """
-        logger.info(
-    f"Saving {
-        len(gdf)} {location_type} locations to database...")
+        logger.info("Saving %d %s locations to database...", len(gdf), location_type)
         
         # Get largest component nodes for snapping
         if location_type in ['residential', 'amenity', 'candidate']:
             logger.info("Finding largest connected component for snapping...")
             largest_component = self._get_largest_component_nodes()
-            logger.info(
-    f"Will snap to {
-        len(largest_component)} nodes in largest component")
+            logger.info("Will snap to %d nodes in largest component",
+                        len(largest_component))
         else:
             largest_component = set()
 
+        # Snap every location in one vectorized KD-tree query
+        snapped_ids = None
+        if largest_component and len(gdf) > 0:
+            snapped_ids = self._snap_to_network(gdf.geometry.y.to_numpy(),
+                                                gdf.geometry.x.to_numpy(),
+                                                largest_component)
+
         saved_count = 0
         error_count = 0
         snapped_count = 0
@@ -759,49 +845,52 @@ class OSMDataLoader:
         batch_size = 100  # Commit every 100 records
 
         try:
-        with self.db.get_session() as session:
+            with self.db.get_session() as session:
                 for i, (idx, row) in enumerate(gdf.iterrows(), 1):
                     try:
-                geom = row.geometry
-                lat = geom.y
-                lon = geom.x
+                        geom = row.geometry
+                        lat = geom.y
+                        lon = geom.x
                         
                         # First, get osm_id (needed for amenities)
-                osm_raw = row.get("osmid", None)
-                osm_id = None
-                if osm_raw is not None and not pd.isna(osm_raw):
-                    osm_id = osm_raw
-                else:
-                    osm_id = idx
-
-                # Handle cases like ('node', 123456) or [123456]
-                if isinstance(osm_id, (list, tuple)):
-                    first = osm_id[0]
-                    if isinstance(first, (list, tuple)) and len(first) > 1:
-                        osm_id = first[1]
-                    else:
-                        osm_id = first
+                        osm_raw = row.get("osmid", None)
+                        osm_id = None
+                        if osm_raw is not None and not pd.isna(osm_raw):
+                            osm_id = osm_raw
+                        else:
+                            osm_id = idx
 
-                try:
-                    osm_id = int(osm_id)
-                except Exception:
-                    # Fallback to numeric index if conversion fails
-                    try:
-                        osm_id = int(idx[1]) if isinstance(idx, (list, tuple)) and len(idx) > 1 else int(idx)
-                    except Exception:
+                        # Handle cases like ('node', 123456) or [123456]
+                        if isinstance(osm_id, (list, tuple)):
+                            first = osm_id[0]
+                            if isinstance(first, (list, tuple)) and len(first) > 1:
+                                osm_id = first[1]
+                            else:
+                                osm_id = first
+
+                        try:
+                            osm_id = int(osm_id)
+                        except Exception:
+                            # Fallback to numeric index if conversion fails
+                            try:
+                                osm_id = int(idx[1]) if isinstance(idx, (list, tuple)) and len(idx) > 1 else int(idx)
+                            except Exception:
                                 error_count += 1
                                 continue
                         
                         # Snap to nearest network node if applicable
                         snapped_node_id = None
                         if largest_component:
-                            snapped_node_id = self._find_nearest_network_node(lat, lon, largest_component)
+                            if snapped_ids is not None:
+                                snapped_node_id = snapped_ids[i - 1]
+                            else:
+                                snapped_node_id = self._find_nearest_network_node(lat, lon, largest_component)
                             if snapped_node_id:
                                 snapped_count += 1
                             else:
                                 # Skip if can't snap
                                 error_count += 1
-                        continue
+                                continue
                 
                         # FIXED: Don't insert into nodes table!
                         # node_id is just the osm_id (identifier), not a network node
@@ -809,50 +898,50 @@ class OSMDataLoader:
                         node_id = osm_id
                 
                         # Insert into specific table WITH SNAPPED NODE
-                if location_type == 'residential':
-                    res_query = """
+                        if location_type == 'residential':
+                            res_query = """
                                 INSERT INTO residential_locations 
                                     (node_id, snapped_node_id, osm_building_id, address, building_type, original_latitude, original_longitude)
                                 VALUES (:node_id, :snapped_node_id, :osm_building_id, :address, :building_type, :orig_lat, :orig_lon)
                                 ON CONFLICT (osm_building_id) DO NOTHING
-                    """
-                    session.execute(text(res_query), {
-                        'node_id': node_id,
+                            """
+                            session.execute(text(res_query), {
+                                'node_id': node_id,
                                 'snapped_node_id': snapped_node_id,  # For pathfinding
                                 'osm_building_id': osm_id,  # Use OSM building ID for uniqueness
-                        'address': row.get('addr:street', ''),
+                                'address': row.get('addr:street', ''),
                                 'building_type': row.get('building', 'residential'),
                                 'orig_lat': lat,  # Original building coordinate
                                 'orig_lon': lon   # Original building coordinate
-                    })
+                            })
                 
-                elif location_type == 'amenity' and amenity_type:
-                    # Get amenity_type_id
-                    type_query = "SELECT amenity_type_id FROM amenity_types WHERE type_name = :type_name"
-                    type_result = session.execute(text(type_query), {'type_name': amenity_type})
-                    amenity_type_id = type_result.scalar()
+                        elif location_type == 'amenity' and amenity_type:
+                            # Get amenity_type_id
+                            type_query = "SELECT amenity_type_id FROM amenity_types WHERE type_name = :type_name"
+                            type_result = session.execute(text(type_query), {'type_name': amenity_type})
+                            amenity_type_id = type_result.scalar()
                     
-                    if amenity_type_id:
-                        amenity_query = """
+                            if amenity_type_id:
+                                amenity_query = """
                                     INSERT INTO existing_amenities 
                                         (node_id, snapped_node_id, amenity_type_id, name, osm_id, original_latitude, original_longitude)
                                     VALUES (:node_id, :snapped_node_id, :amenity_type_id, :name, :osm_id, :orig_lat, :orig_lon)
                                     ON CONFLICT (osm_id, amenity_type_id) DO NOTHING
-                        """
-                        session.execute(text(amenity_query), {
-                            'node_id': node_id,
+                                """
+                                session.execute(text(amenity_query), {
+                                    'node_id': node_id,
                                     'snapped_node_id': snapped_node_id,  # For pathfinding
-                            'amenity_type_id': amenity_type_id,
-                            'name': row.get('name', ''),
+                                    'amenity_type_id': amenity_type_id,
+                                    'name': row.get('name', ''),
                                     'osm_id': osm_id,
                                     'orig_lat': lat,  # Original amenity coordinate
                                     'orig_lon': lon   # Original amenity coordinate
-                        })
+                                })
                             else:
                                 logger.warning(f"Amenity type '{amenity_type}' not found in database")
                 
-                elif location_type == 'candidate':
-                    cand_query = """
+                        elif location_type == 'candidate':
+                            cand_query = """
                                 INSERT INTO candidate_locations 
                                     (node_id, snapped_node_id, capacity, location_type, original_latitude, original_longitude)
                                 VALUES (:node_id, :snapped_node_id, :capacity, :location_type, :orig_lat, :orig_lon)
@@ -860,11 +949,11 @@ class OSMDataLoader:
                                     snapped_node_id = EXCLUDED.snapped_node_id,
                                     original_latitude = EXCLUDED.original_latitude,
                                     original_longitude = EXCLUDED.original_longitude
-                    """
-                    session.execute(text(cand_query), {
-                        'node_id': node_id,
+                            """
+                            session.execute(text(cand_query), {
+                                'node_id': node_id,
                                 'snapped_node_id': snapped_node_id,  # For pathfinding
-                        'capacity': 1,  # Default capacity
+                                'capacity': 1,  # Default capacity
                                 'location_type': row.get('amenity', 'parking'),
                                 'orig_lat': lat,  # Original candidate coordinate
                                 'orig_lon': lon   # Original candidate coordinate
@@ -874,7 +963,8 @@ class OSMDataLoader:
                         
                         # ⚡ Progress update every 100 records
                         if i % 100 == 0:
-                            logger.info(f"  Progress: {i}/{total} ({i*100//total}%) - {saved_count} saved, {snapped_count} snapped")
+                            logger.info("  Progress: %d/%d (%d%%) - %d saved, %d snapped",
+                                        i, total, i * 100 // total, saved_count, snapped_count)
                         
                         # ⚡ Commit every batch
                         if i % batch_size == 0:
@@ -882,7 +972,7 @@ class OSMDataLoader:
                         
                     except Exception as e:
                         error_count += 1
-                        logger.debug(f"Error saving location {idx}: {e}")
+                        logger.debug("Error saving location %s: %s", idx, e)
                         continue
                 
                 # Final commit
@@ -950,39 +1040,46 @@ class OSMDataLoader:
         logger.info("=" * 60)
     
     def _print_statistics(self, elapsed_time: float):
-        """Print comprehensive loading statistics."""
-        logger.info("\n" + "=" * 60)
-        logger.info("OSM DATA LOADING STATISTICS")
-        logger.info("=" * 60)
-        logger.info(f"Load timestamp: {self.stats['load_timestamp']}")
-        logger.info(f"Total loading time: {elapsed_time:.2f} seconds")
-        logger.info("")
-        logger.info("NETWORK:")
-        logger.info(f"  Nodes: {self.stats['network_nodes']}")
-        logger.info(f"  Edges: {self.stats['network_edges']}")
-        logger.info("")
-        logger.info("RESIDENTIAL LOCATIONS:")
-        logger.info(f"  Total buildings found: {self.stats['residential_total']}")
-        logger.info(f"  After filtering: {self.stats['residential_filtered']}")
-        logger.info(f"  Duplicates removed: {self.stats['residential_duplicates']}")
-        logger.info("")
-        logger.info("AMENITIES BY TYPE:")
-        for amenity_type, count in sorted(self.stats['amenities_by_type'].items()):
-            logger.info(f"  {amenity_type}: {count}")
-        logger.info("")
-        logger.info("CANDIDATE LOCATIONS:")
-        logger.info(f"  Total candidates: {self.stats['candidates_total']}")
-        logger.info("")
-        
+        """Print comprehensive loading statistics (as one log record)."""
         if self.stats['data_quality_issues']:
-            logger.warning("DATA QUALITY ISSUES:")
-            for issue in self.stats['data_quality_issues']:
-                logger.warning(f"  - {issue}")
-        else:
-            logger.info("No data quality issues detected")
-        
-        logger.info("=" * 60)
-
+            logger.warning("DATA QUALITY ISSUES:\n%s", "\n".join(
+                f"  - {issue}" for issue in self.stats['data_quality_issues']))
+
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
+        lines = [
+            "",
+            "=" * 60,
+            "OSM DATA LOADING STATISTICS",
+            "=" * 60,
+            f"Load timestamp: {self.stats['load_timestamp']}",
+            f"Total loading time: {elapsed_time:.2f} seconds",
+            "",
+            "NETWORK:",
+            f"  Nodes: {self.stats['network_nodes']}",
+            f"  Edges: {self.stats['network_edges']}",
+            "",
+            "RESIDENTIAL LOCATIONS:",
+            f"  Total buildings found: {self.stats['residential_total']}",
+            f"  After filtering: {self.stats['residential_filtered']}",
+            f"  Duplicates removed: {self.stats['residential_duplicates']}",
+            "",
+            "AMENITIES BY TYPE:",
+        ]
+        for amenity_type, count in sorted(self.stats['amenities_by_type'].items()):
+            lines.append(f"  {amenity_type}: {count}")
+        lines += [
+            "",
+            "CANDIDATE LOCATIONS:",
+            f"  Total candidates: {self.stats['candidates_total']}",
+            "",
+        ]
+        if not self.stats['data_quality_issues']:
+            lines.append("No data quality issues detected")
+        lines.append("=" * 60)
+
+        logger.info("\n".join(lines))
 
 if __name__ == "__main__":
     loader = OSMDataLoader()
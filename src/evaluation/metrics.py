@@ -3,11 +3,10 @@ Evaluation metrics and success criteria checking.
 Implements success criteria from the presentation.
 """
 from typing import Dict, Set, List, Tuple
-import yaml
 from sqlalchemy import text
 from src.network.pedestrian_graph import PedestrianGraph
 from src.scoring.walkscore import WalkScoreCalculator
-from src.utils.database import get_db_manager
+from src.utils.database import get_db_manager, load_config
 
 
 class MetricsEvaluator:
@@ -21,8 +20,7 @@ class MetricsEvaluator:
         self.db = graph.db
         
         # Load configuration
-        with open(config_path, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config(config_path)
         
         self.success_criteria = self.config['success_criteria']
         self.fifteen_minutes_meters = self.config['walkscore']['fifteen_minutes_meters']
@@ -5,6 +5,7 @@ Orchestrates data loading, graph creation, optimization, and visualization.
 import argparse
 import sys
 import os
+import traceback
 
 # Add project root to path (works from both src/ and project root)
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -19,6 +20,12 @@ from src.evaluation.metrics import MetricsEvaluator
 from src.utils.database import get_db_manager
 
 
+def _report_error(message: str, e: Exception):
+    """Print a pipeline step failure with its traceback."""
+    print(f"{message}: {e}")
+    traceback.print_exc()
+
+
 def main():
     """Main pipeline execution."""
     parser = argparse.ArgumentParser(description='Walkability Optimization Pipeline')
@@ -176,9 +183,7 @@ def main():
             print("✓ Demo replay completed\\n")
             
         except Exception as e:
-            print(f"ERROR in demo replay: {e}")
-            import traceback
-            traceback.print_exc()
+            _report_error("ERROR in demo replay", e)
             return 1
     
     # Normal Optimization
@@ -191,9 +196,7 @@ def main():
             solutions['greedy'] = greedy_solution
             print("✓ Greedy optimization completed\n")
         except Exception as e:
-            print(f"ERROR in greedy optimization: {e}")
-            import traceback
-            traceback.print_exc()
+            _report_error("ERROR in greedy optimization", e)
     
 
     
@@ -203,35 +206,32 @@ def main():
         visualizer = MapVisualizer(graph, scorer)
         
         try:
-            # Baseline maps (both normal and heatmap)
-            visualizer.create_baseline_map("visualizations/baseline_map.html")
-            visualizer.create_baseline_heatmap("visualizations/baseline_heatmap.html")
+            # Baseline maps (both normal and heatmap) are rendered alongside
+            # the first solution's maps
+            baseline_rendered = False
             
             # Optimized maps (both normal and heatmap for each algorithm)
             for algo_name, solution in solutions.items():
                 if solution:
                     scenario = f'{algo_name}_k{args.k}'
                     
-                    # Normal map (blue dots + amenities)
-                    visualizer.create_optimized_map(
-                        solution, scenario, f"visualizations/{scenario}_map.html"
-                    )
-                    
-                    # Heatmap (gradient visualization)
-                    visualizer.create_optimized_heatmap(
-                        solution, scenario, f"visualizations/{scenario}_heatmap.html"
-                    )
+                    # Normal map (blue dots + amenities) and heatmap, in parallel
+                    visualizer.render_all(solution, scenario, "visualizations",
+                                          include_baseline=not baseline_rendered)
+                    baseline_rendered = True
                     
                     # Comparison map
                     visualizer.create_comparison_map(
                         solution, scenario, f"visualizations/{scenario}_comparison.html"
                     )
             
+            if not baseline_rendered:
+                visualizer.create_baseline_map("visualizations/baseline_map.html")
+                visualizer.create_baseline_heatmap("visualizations/baseline_heatmap.html")
+            
             print("✓ Visualizations created\n")
         except Exception as e:
-            print(f"ERROR creating visualizations: {e}")
-            import traceback
-            traceback.print_exc()
+            _report_error("ERROR creating visualizations", e)
     
     # Step 8: Evaluation
     if args.evaluate:
@@ -254,9 +254,7 @@ def main():
                 f.write(report)
             print(f"\nReport saved to results/evaluation_report.txt")
         except Exception as e:
-            print(f"ERROR in evaluation: {e}")
-            import traceback
-            traceback.print_exc()
+            _report_error("ERROR in evaluation", e)
     
     print("=" * 80)
     print("PIPELINE COMPLETED")
@@ -3,9 +3,10 @@ Shortest path distance computation using Dijkstra's algorithm.
 Computes distances between residential locations (N) and 
 candidate/existing locations (M ∪ L).
 """
+import os
 import networkx as nx
 import numpy as np
-from typing import Dict, Set, Tuple, List
+from typing import Dict, Set, Tuple, List, Optional
 from sqlalchemy import text
 from src.network.pedestrian_graph import PedestrianGraph
 from src.utils.database import get_db_manager
@@ -51,7 +52,7 @@ class ShortestPathCalculator:
         self.distance_matrix = {}  # {(i, j): distance}
         self.D_infinity = 2400.0  # Maximum distance (meters) - from paper
         
-    def compute_all_distances(self, save_to_db: bool = True, use_multiprocessing: bool = True, n_workers: int = 8):
+    def compute_all_distances(self, save_to_db: bool = True, use_multiprocessing: bool = True, n_workers: Optional[int] = None):
         """
         Compute shortest path distances for all (i, j) pairs.
         
@@ -60,7 +61,7 @@ class ShortestPathCalculator:
         Args:
             save_to_db: Save to database after computation
             use_multiprocessing: Use parallel processing (default: True)
-            n_workers: Number of worker processes (default: 8)
+            n_workers: Number of worker processes (default: one per CPU core)
         """
         print("Computing shortest path distances...")
         
@@ -83,6 +84,8 @@ class ShortestPathCalculator:
         print(f"Total pairs: {len(N) * len(destinations):,}")
         
         if use_multiprocessing and len(N) > 100:
+            if n_workers is None:
+                n_workers = os.cpu_count() or 1
             print(f"Using multiprocessing with {n_workers} workers ⚡")
             self._compute_parallel(G, N, destinations, n_workers)
         else:
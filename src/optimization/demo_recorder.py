@@ -66,50 +66,38 @@ class DemoRecorder:
         
         try:
             with self.db.get_session() as session:
-                # Get amenity_type_id
-                type_query = """
-                    SELECT amenity_type_id FROM amenity_types 
-                    WHERE type_name = :type_name
-                """
-                amenity_type_id = session.execute(
-                    text(type_query), {'type_name': amenity_type}
-                ).scalar()
-                
-                if not amenity_type_id:
-                    print(f"[RECORDING] Warning: Unknown amenity type '{amenity_type}', skipping")
-                    return
-                
-                # Get candidate_id from node_id
-                cand_query = """
-                    SELECT candidate_id FROM candidate_locations 
-                    WHERE node_id = :node_id
-                """
-                candidate_id = session.execute(
-                    text(cand_query), {'node_id': candidate_node_id}
-                ).scalar()
-                
-                if not candidate_id:
-                    print(f"[RECORDING] Warning: Node {candidate_node_id} not in candidate_locations, skipping")
-                    return
-                
-                # Insert iteration record
+                # Resolve amenity_type_id and candidate_id (from node_id) and
+                # insert the iteration record in a single round-trip
                 insert_query = """
                     INSERT INTO optimization_iterations
                     (scenario, iteration_number, amenity_type_id, candidate_id,
                      improvement, current_objective, progress_pct, elapsed_seconds)
-                    VALUES (:scenario, :iteration, :amenity_type_id, :candidate_id,
-                            :improvement, :objective, :progress, :elapsed)
+                    SELECT :scenario, :iteration, at.amenity_type_id, cl.candidate_id,
+                           :improvement, :objective, :progress, :elapsed
+                    FROM amenity_types at
+                    CROSS JOIN (
+                        SELECT candidate_id FROM candidate_locations
+                        WHERE node_id = :node_id
+                        LIMIT 1
+                    ) cl
+                    WHERE at.type_name = :type_name
                 """
-                session.execute(text(insert_query), {
+                result = session.execute(text(insert_query), {
                     'scenario': self.scenario,
                     'iteration': self.iteration_count,
-                    'amenity_type_id': amenity_type_id,
-                    'candidate_id': candidate_id,
+                    'type_name': amenity_type,
+                    'node_id': candidate_node_id,
                     'improvement': improvement,
                     'objective': current_objective,
                     'progress': progress,
                     'elapsed': elapsed
                 })
+                
+                if result.rowcount == 0:
+                    print(f"[RECORDING] Warning: Unknown amenity type '{amenity_type}' or "
+                          f"node {candidate_node_id} not in candidate_locations, skipping")
+                    return
+                
                 session.commit()
                 
                 if self.iteration_count % 10 == 0:
@@ -3,12 +3,12 @@ WalkScore calculation based on weighted walking distances.
 Implements Piecewise Linear Function (PWL) as described in the paper.
 """
 import numpy as np
+from bisect import bisect_right
 from typing import Dict, List, Set, Tuple
-import yaml
 from sqlalchemy import text
 from src.network.pedestrian_graph import PedestrianGraph
 from src.network.shortest_paths import ShortestPathCalculator
-from src.utils.database import get_db_manager
+from src.utils.database import get_db_manager, load_config
 
 
 class WalkScoreCalculator:
@@ -22,13 +22,34 @@ class WalkScoreCalculator:
         self.db = graph.db
         
         # Load configuration
-        with open(config_path, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config(config_path)
         
         walkscore_config = self.config['walkscore']
         self.breakpoints = walkscore_config['breakpoints']  # [0, 400, 1800, 2400]
         self.scores = walkscore_config['scores']  # [100, 100, 0, 0]
         
+        # The interpolation below assumes a well-formed PWL: one score per
+        # breakpoint, breakpoints sorted by distance
+        if len(self.breakpoints) < 2 or len(self.breakpoints) != len(self.scores):
+            raise ValueError("walkscore.breakpoints and walkscore.scores must have the "
+                             "same length (at least 2)")
+        if any(b2 < b1 for b1, b2 in zip(self.breakpoints, self.breakpoints[1:])):
+            raise ValueError(f"walkscore.breakpoints must be non-decreasing: {self.breakpoints}")
+        
+        # PWL knots as arrays for np.interp (scores clamped to the 0-100 range)
+        self._pwl_x = np.asarray(self.breakpoints, dtype=np.float64)
+        self._pwl_y = np.clip(np.asarray(self.scores, dtype=np.float64), 0, 100)
+        
+        # Scalar lookup table: knot positions plus (x1, y1, slope) per segment, so one
+        # score is a C-level binary search and a multiply-add (no NumPy scalar overhead)
+        self._pwl_knots = self._pwl_x.tolist()
+        self._pwl_knot_scores = self._pwl_y.tolist()
+        self._pwl_segments = [
+            (x1, y1, (y2 - y1) / (x2 - x1) if x2 != x1 else 0.0)
+            for x1, y1, x2, y2 in zip(self._pwl_knots, self._pwl_knot_scores,
+                                      self._pwl_knots[1:], self._pwl_knot_scores[1:])
+        ]
+        
         # Load amenity weights from database
         self._load_amenity_weights()
     
@@ -44,6 +65,15 @@ class WalkScoreCalculator:
             result = session.execute(text(query))
             self.plain_weights = {row[0]: float(row[1]) for row in result}
             
+            # Load depth amenity category weights (wa) once instead of per residential
+            depth_category_query = """
+                SELECT type_name, weight
+                FROM amenity_types
+                WHERE type_category = 'depth'
+            """
+            result = session.execute(text(depth_category_query))
+            self.depth_category_weights = {row[0]: float(row[1]) for row in result}
+            
             # Load depth weights
             depth_query = """
                 SELECT at.type_name, dw.choice_rank, dw.weight
@@ -60,6 +90,13 @@ class WalkScoreCalculator:
                 if type_name not in self.depth_weights:
                     self.depth_weights[type_name] = {}
                 self.depth_weights[type_name][rank] = float(weight)
+        
+        # Depth weights as rank-ordered vectors (wap for p=1..r, 0 for missing ranks)
+        self.depth_weight_vectors = {
+            type_name: np.array([ranks.get(p, 0.0) for p in range(1, len(ranks) + 1)],
+                                dtype=np.float64)
+            for type_name, ranks in self.depth_weights.items()
+        }
     
     def piecewise_linear_score(self, distance: float) -> float:
         """
@@ -71,25 +108,31 @@ class WalkScoreCalculator:
         Returns:
             WalkScore (0-100)
         """
-        # Clamp distance to valid range
-        distance = max(0, min(distance, self.breakpoints[-1]))
-        
-        # Find which segment the distance falls into
-        for i in range(len(self.breakpoints) - 1):
-            if self.breakpoints[i] <= distance <= self.breakpoints[i + 1]:
-                # Linear interpolation
-                x1, y1 = self.breakpoints[i], self.scores[i]
-                x2, y2 = self.breakpoints[i + 1], self.scores[i + 1]
-                
-                if x2 == x1:
-                    return y1
-                
-                # Linear interpolation: y = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
-                score = y1 + (y2 - y1) * (distance - x1) / (x2 - x1)
-                return max(0, min(100, score))
+        knots = self._pwl_knots
+        
+        # Clamp to the breakpoint range
+        if distance <= knots[0]:
+            return self._pwl_knot_scores[0]
+        if distance >= knots[-1]:
+            return self._pwl_knot_scores[-1]
+        
+        x1, y1, slope = self._pwl_segments[bisect_right(knots, distance) - 1]
+        return y1 + slope * (distance - x1)
+    
+    def piecewise_linear_scores(self, distances) -> np.ndarray:
+        """
+        Vectorized piecewise_linear_score for many distances at once.
+        
+        Distances outside the breakpoint range take the first/last score,
+        same as clamping in the scalar version.
         
-        # Distance beyond maximum breakpoint
-        return self.scores[-1]
+        Args:
+            distances: Array-like of weighted walking distances in meters
+            
+        Returns:
+            Array of WalkScores (0-100)
+        """
+        return np.interp(np.asarray(distances, dtype=np.float64), self._pwl_x, self._pwl_y)
     
     def compute_weighted_distance(self, residential_id: int, 
                                  allocated_amenities: Dict[str, Set[int]] = None) -> float:
@@ -145,16 +188,8 @@ class WalkScoreCalculator:
         # Process DEPTH amenities (Adepth): multiple choices with depth weights
         # Contribution: wa * Σ(wap * Di,a^p) for p=1..r
         for amenity_type, depth_weights_dict in self.depth_weights.items():
-            # Get category weight for this amenity type
-            # For depth amenities, we need to look up the category weight from database
-            with self.db.get_session() as session:
-                query = """
-                    SELECT weight FROM amenity_types WHERE type_name = :type_name
-                """
-                result = session.execute(text(query), {'type_name': amenity_type})
-                category_weight = result.scalar()
-                if category_weight is None:
-                    category_weight = 0.6  # default for restaurant
+            # Get category weight for this amenity type (preloaded in _load_amenity_weights)
+            category_weight = self.depth_category_weights.get(amenity_type, 0.6)  # default for restaurant
             
             # Get all possible locations
             all_locations = self.graph.get_all_amenity_locations(amenity_type)
@@ -165,29 +200,28 @@ class WalkScoreCalculator:
             
             if all_locations:
                 # Get distances to all locations
-                distances = []
-                for loc_id in all_locations:
-                    distance = self.path_calculator.get_distance(residential_id, loc_id)
-                    distances.append(distance)
+                distances = np.fromiter(
+                    (self.path_calculator.get_distance(residential_id, loc_id)
+                     for loc_id in all_locations),
+                    dtype=np.float64, count=len(all_locations)
+                )
+                
+                wap = self.depth_weight_vectors[amenity_type]  # depth weight per rank p
+                r = len(wap)  # number of choices (e.g., 10 for restaurant)
+                
+                # Select the r nearest in O(n), then sort only those to rank them
+                if len(distances) > r:
+                    nearest = np.partition(distances, r - 1)[:r]
+                else:
+                    nearest = distances
+                nearest.sort()
                 
-                # Sort by distance to get p-th nearest
-                distances.sort()
-                r = len(depth_weights_dict)  # number of choices (e.g., 10 for restaurant)
+                # p-th nearest doesn't exist -> use D_infinity
+                distance_p = np.full(r, self.path_calculator.D_infinity)
+                distance_p[:len(nearest)] = nearest
                 
                 # Calculate: Σ(wap * Di,a^p) for p=1..r
-                depth_contribution = 0.0
-                for rank in range(1, r + 1):
-                    if rank in depth_weights_dict:
-                        wap = depth_weights_dict[rank]  # depth weight for rank p
-                        
-                        if rank <= len(distances):
-                            # p-th nearest exists
-                            distance_p = distances[rank - 1]
-                        else:
-                            # p-th nearest doesn't exist, use D_infinity
-                            distance_p = self.path_calculator.D_infinity
-                        
-                        depth_contribution += wap * distance_p
+                depth_contribution = float(np.dot(wap, distance_p))
                 
                 # Add: wa * Σ(wap * Di,a^p)
                 weighted_distance += category_weight * depth_contribution
@@ -242,17 +276,22 @@ class WalkScoreCalculator:
             # Load distances for these network nodes
             self.path_calculator.load_batch_for_residential(snapped_node_ids)
             
+            batch_distances = []
             for i, (residential_id, snapped_node_id) in enumerate(batch, start=start + 1):
                 # Use snapped_node_id for pathfinding
                 weighted_dist = self.compute_weighted_distance(snapped_node_id)
-                score = self.piecewise_linear_score(weighted_dist)
+                batch_distances.append(weighted_dist)
                 
                 # Store with residential_id (building ID)
-                scores[residential_id] = score
                 weighted_distances[residential_id] = weighted_dist
                 
                 if i % 100 == 0:
                     print(f"  Computed {i}/{total} scores...")
+            
+            # Score the whole batch in one vectorized PWL call
+            batch_scores = self.piecewise_linear_scores(batch_distances)
+            for (residential_id, _), score in zip(batch, batch_scores.tolist()):
+                scores[residential_id] = score
         
         print(f"Computed {len(scores)} baseline WalkScores")
         
@@ -338,19 +377,21 @@ class WalkScoreCalculator:
         if not scores:
             return {}
         
-        score_values = list(scores.values())
+        # One array pass; plain Python numbers keep the stats JSON-serializable
+        score_values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        q25, median, q75 = np.percentile(score_values, [25, 50, 75])
         
         stats = {
             'count': len(scores),
-            'mean': np.mean(score_values),
-            'median': np.median(score_values),
-            'std': np.std(score_values),
-            'min': np.min(score_values),
-            'max': np.max(score_values),
-            'q25': np.percentile(score_values, 25),
-            'q75': np.percentile(score_values, 75),
-            'scores_above_50': sum(1 for s in score_values if s >= 50),
-            'scores_above_75': sum(1 for s in score_values if s >= 75)
+            'mean': float(score_values.mean()),
+            'median': float(median),
+            'std': float(score_values.std()),
+            'min': float(score_values.min()),
+            'max': float(score_values.max()),
+            'q25': float(q25),
+            'q75': float(q75),
+            'scores_above_50': int(np.count_nonzero(score_values >= 50)),
+            'scores_above_75': int(np.count_nonzero(score_values >= 75))
         }
         
         return stats
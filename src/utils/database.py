@@ -2,11 +2,58 @@
 Database connection and utility functions for PostgreSQL.
 """
 import os
+import io
+import csv
+import copy
+import threading
 import yaml
+from collections import OrderedDict
+from psycopg2 import sql
+from psycopg2.extras import execute_values
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 from contextlib import contextmanager
-from typing import Optional
+from typing import Iterable, Optional, Sequence
+
+
+# Parsed config files keyed by absolute path -> (mtime_ns, size, config)
+_YAML_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_YAML_CACHE_MAX_ENTRIES = 100
+
+# SQL files keyed by absolute path -> (mtime_ns, size, sql)
+_SCHEMA_CACHE: dict = {}
+
+# LibYAML's C parser when PyYAML was built with it, pure-Python otherwise
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def load_config(config_path: str = "config.yaml") -> dict:
+    """
+    Load configuration from YAML file (cached by path, mtime and size).
+    
+    Args:
+        config_path: Path to the YAML config file
+    
+    Returns:
+        Deep copy of the parsed config, safe for the caller to modify
+    """
+    st = os.stat(config_path)
+    key = os.path.abspath(config_path)
+    
+    cached = _YAML_CACHE.get(key)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        _YAML_CACHE.move_to_end(key)
+        return copy.deepcopy(cached[2])
+    
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.load(f, Loader=_YAML_LOADER)
+    
+    _YAML_CACHE[key] = (st.st_mtime_ns, st.st_size, config)
+    _YAML_CACHE.move_to_end(key)
+    if len(_YAML_CACHE) > _YAML_CACHE_MAX_ENTRIES:
+        _YAML_CACHE.popitem(last=False)
+    
+    return copy.deepcopy(config)
 
 
 class DatabaseManager:
@@ -17,12 +64,12 @@ class DatabaseManager:
         self.config = self._load_config(config_path)
         self.engine = None
         self.Session = None
+        # Per-thread get_session() nesting depth
+        self._local = threading.local()
         
     def _load_config(self, config_path: str) -> dict:
         """Load configuration from YAML file."""
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-        return config
+        return load_config(config_path)
     
     def connect(self):
         """Create database connection."""
@@ -40,24 +87,48 @@ class DatabaseManager:
             f"{db_host}:{db_port}/{db_name}"
         )
         
-        self.engine = create_engine(connection_string, pool_pre_ping=True)
-        self.Session = sessionmaker(bind=self.engine)
+        # One pooled engine per manager; get_db_manager() shares it process-wide
+        self.engine = create_engine(
+            connection_string,
+            pool_pre_ping=True,
+            pool_size=db_config.get('pool_size', 25),
+            max_overflow=db_config.get('max_overflow', 25),
+            pool_recycle=db_config.get('pool_recycle', 3600),
+            executemany_mode='values_plus_batch'
+        )
+        # Thread-local session reused across get_session() calls
+        self.Session = scoped_session(
+            sessionmaker(bind=self.engine, expire_on_commit=False, autoflush=False)
+        )
         
     @contextmanager
     def get_session(self):
-        """Get database session context manager."""
+        """
+        Get database session context manager.
+        
+        Sessions are thread-local and re-entrant: nested get_session() blocks
+        on one thread share the session, and only the outermost block commits
+        (or rolls back) and closes it, so inner blocks never end the
+        transaction of the block that encloses them.
+        """
         if self.Session is None:
             self.connect()
         
+        depth = getattr(self._local, 'depth', 0)
         session = self.Session()
+        self._local.depth = depth + 1
         try:
             yield session
-            session.commit()
+            if depth == 0:
+                session.commit()
         except Exception:
-            session.rollback()
+            if depth == 0:
+                session.rollback()
             raise
         finally:
-            session.close()
+            self._local.depth = depth
+            if depth == 0:
+                self.Session.remove()
     
     def execute_query(self, query: str, params: Optional[dict] = None):
         """Execute a raw SQL query."""
@@ -65,6 +136,45 @@ class DatabaseManager:
             result = session.execute(text(query), params or {})
             return result.fetchall()
     
+    def bulk_insert(self, table: str, columns: Sequence[str], rows: Iterable[Sequence],
+                    page_size: int = 1000) -> None:
+        """
+        Insert many rows with psycopg2 execute_values (one statement per page).
+        
+        Args:
+            table: Target table name
+            columns: Column names, in row order
+            rows: Row tuples to insert
+            page_size: Rows sent per INSERT statement
+        """
+        if self.engine is None:
+            self.connect()
+        
+        statement = _insert_statement(table, columns)
+        with self.engine.begin() as conn:
+            cursor = conn.connection.cursor()
+            try:
+                execute_values(cursor, statement, rows, page_size=page_size)
+            finally:
+                cursor.close()
+    
+    def bulk_copy(self, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> None:
+        """Load many rows with COPY ... FROM STDIN (fastest path for very large loads)."""
+        if self.engine is None:
+            self.connect()
+        
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        
+        statement = _copy_statement(table, columns)
+        with self.engine.begin() as conn:
+            cursor = conn.connection.cursor()
+            try:
+                cursor.copy_expert(statement, buffer)
+            finally:
+                cursor.close()
+    
     def check_connection(self) -> bool:
         """Check if database connection is working."""
         try:
@@ -82,8 +192,7 @@ class DatabaseManager:
         if not os.path.exists(schema_path):
             raise FileNotFoundError(f"Schema file not found: {schema_path}")
         
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema_sql = f.read()
+        schema_sql = _read_sql_file(schema_path)
         
         if self.engine is None:
             self.connect()
@@ -96,6 +205,37 @@ class DatabaseManager:
         print(f"Schema created successfully from {schema_path}")
 
 
+def _insert_statement(table: str, columns: Sequence[str]) -> sql.Composed:
+    """INSERT ... VALUES %s for execute_values, with quoted identifiers."""
+    return sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+
+
+def _copy_statement(table: str, columns: Sequence[str]) -> sql.Composed:
+    """COPY ... FROM STDIN (CSV) for copy_expert, with quoted identifiers."""
+    return sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+
+
+def _read_sql_file(path: str) -> str:
+    """Read a SQL file, reusing the cached text while mtime and size are unchanged."""
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    
+    entry = _SCHEMA_CACHE.get(key)
+    if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+        return entry[2]
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        sql_text = f.read()
+    _SCHEMA_CACHE[key] = (st.st_mtime_ns, st.st_size, sql_text)
+    return sql_text
+
+
 # Global database manager instance
 _db_manager: Optional[DatabaseManager] = None
 
@@ -8,19 +8,45 @@ Features:
 - Network visualization
 - Statistical plots
 """
-import folium
-from folium import plugins
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 from typing import Dict, Set, List, Optional
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 import json
 
 
+# Marker styling per amenity type
+_AMENITY_COLORS = {
+    'grocery': 'blue',
+    'restaurant': 'orange',
+    'school': 'purple',
+    'healthcare': 'red'
+}
+
+_AMENITY_ICONS = {
+    'grocery': 'shopping-cart',
+    'restaurant': 'cutlery',
+    'school': 'book',
+    'healthcare': 'plus-sign'
+}
+
+# Batched coordinate lookups, built once and reused for every call
+COORDS_SQL = {
+    table: text(f"""
+        SELECT node_id, latitude, longitude FROM {table}
+        WHERE node_id IN :ids
+    """).bindparams(bindparam('ids', expanding=True))
+    for table in ('residential_locations', 'candidate_locations')
+}
+
+
 class MapPlotter:
     """Create interactive maps for walkability visualization."""
     
+    # Rows fetched per round-trip when streaming network edges
+    EDGE_CHUNK_SIZE = 10000
+    # Default cap on edges drawn by plot_network_graph (browser-side limit)
+    MAX_NETWORK_EDGES = 50000
+    
     def __init__(self, graph, scorer, db):
         """Initialize map plotter."""
         self.graph = graph
@@ -30,9 +56,18 @@ class MapPlotter:
         # Balıkesir center
         self.center_lat = 39.6400
         self.center_lon = 27.8750
+        
+        # Location tables are static during a run: cache lookups per instance
+        self._coord_cache: Dict[str, Dict[int, tuple]] = {
+            'residential_locations': {},
+            'candidate_locations': {}
+        }
+        self._amenity_rows = None
     
     def create_base_map(self, zoom_start=13):
         """Create base folium map centered on Balıkesir."""
+        import folium
+        
         m = folium.Map(
             location=[self.center_lat, self.center_lon],
             zoom_start=zoom_start,
@@ -40,6 +75,49 @@ class MapPlotter:
         )
         return m
     
+    def _fetch_coords(self, table: str, ids) -> Dict[int, tuple]:
+        """
+        Fetch coordinates for many node ids in a single query.
+        
+        Ids already resolved by an earlier call are served from the
+        instance cache; only the missing ones hit the database.
+        
+        Args:
+            table: Location table to read from (residential_locations, candidate_locations)
+            ids: Iterable of node ids
+            
+        Returns:
+            Dict mapping node_id -> (lat, lon)
+        """
+        cache = self._coord_cache[table]
+        ids = set(ids)
+        missing = [node_id for node_id in ids if node_id not in cache]
+        
+        if missing:
+            with self.db.get_session() as session:
+                result = session.execute(COORDS_SQL[table], {'ids': tuple(missing)}).fetchall()
+            
+            cache.update((node_id, (lat, lon)) for node_id, lat, lon in result)
+        
+        return {node_id: cache[node_id] for node_id in ids if node_id in cache}
+    
+    @staticmethod
+    def _build_heat_data(scores: Dict[int, float], coords: Dict[int, tuple]) -> List[list]:
+        """Build [lat, lon, weight] heatmap rows, weighting by score/100."""
+        ids = np.fromiter((rid for rid in scores if rid in coords), dtype=np.int64)
+        if len(ids) == 0:
+            return []
+        
+        latlon = np.array([coords[rid] for rid in ids], dtype=np.float64)
+        weights = np.fromiter((scores[rid] for rid in ids), dtype=np.float32,
+                              count=len(ids)) / 100.0
+        # Round before tolist() so json serialization inside HeatMap emits short
+        # literals (6 decimals ≈ 0.1 m) instead of 17-digit float32 artefacts
+        heat = np.column_stack([latlon[:, 0], latlon[:, 1], weights])
+        heat[:, :2] = np.round(heat[:, :2], 6)
+        heat[:, 2] = np.round(heat[:, 2], 3)
+        return heat.tolist()
+    
     def plot_walkability_map(self, scores: Dict[int, float], 
                             solution: Optional[Dict[str, Set[int]]] = None,
                             output_file: str = "walkability_map.html"):
@@ -51,27 +129,16 @@ class MapPlotter:
             solution: Optional allocation solution to overlay
             output_file: Output HTML file
         """
+        import folium
+        from folium import plugins
+        
         print(f"Creating walkability map...")
         
         m = self.create_base_map()
         
-        # Add WalkScore heatmap
-        heat_data = []
-        
-        for residential_id, score in scores.items():
-            # Get coordinates
-            with self.db.get_session() as session:
-                query = """
-                    SELECT latitude, longitude FROM residential_locations 
-                    WHERE node_id = :node_id
-                """
-                result = session.execute(text(query), {'node_id': residential_id})
-                row = result.fetchone()
-                
-                if row:
-                    lat, lon = row
-                    # Weight by score (higher score = more intense)
-                    heat_data.append([lat, lon, score/100.0])
+        # Add WalkScore heatmap (weight by score: higher score = more intense)
+        coords = self._fetch_coords('residential_locations', scores.keys())
+        heat_data = self._build_heat_data(scores, coords)
         
         # Add heatmap layer
         plugins.HeatMap(
@@ -116,63 +183,81 @@ class MapPlotter:
     
     def _add_existing_amenities(self, m):
         """Add existing amenities to map."""
-        amenity_colors = {
-            'grocery': 'blue',
-            'restaurant': 'orange',
-            'school': 'purple',
-            'healthcare': 'red'
-        }
+        import folium
         
-        with self.db.get_session() as session:
-            query = """
-                SELECT al.latitude, al.longitude, at.type_name
-                FROM amenity_locations al
-                JOIN amenity_types at ON al.amenity_type_id = at.amenity_type_id
-            """
-            result = session.execute(text(query))
-            
-            for row in result:
-                lat, lon, amenity_type = row
-                color = amenity_colors.get(amenity_type, 'gray')
-                
-                folium.CircleMarker(
-                    location=[lat, lon],
-                    radius=4,
-                    color=color,
-                    fill=True,
-                    fillOpacity=0.7,
-                    popup=f"Existing {amenity_type}"
-                ).add_to(m)
+        if self._amenity_rows is None:
+            with self.db.get_session() as session:
+                query = """
+                    SELECT al.latitude, al.longitude, at.type_name
+                    FROM amenity_locations al
+                    JOIN amenity_types at ON al.amenity_type_id = at.amenity_type_id
+                """
+                self._amenity_rows = session.execute(text(query)).fetchall()
+        
+        if not self._amenity_rows:
+            return
+        
+        # One GeoJSON layer instead of a CircleMarker child per amenity
+        get_color = _AMENITY_COLORS.get
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [float(lon), float(lat)]},
+                "properties": {
+                    "popup": f"Existing {amenity_type}",
+                    "color": get_color(amenity_type, 'gray')
+                }
+            }
+            for lat, lon, amenity_type in self._amenity_rows
+        ]
+        
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            name="Existing amenities",
+            marker=folium.CircleMarker(radius=4, fill=True, fill_opacity=0.7),
+            style_function=lambda feature: {
+                'color': feature['properties']['color'],
+                'fillColor': feature['properties']['color']
+            },
+            popup=folium.GeoJsonPopup(fields=['popup'], labels=False)
+        ).add_to(m)
     
     def _add_allocated_amenities(self, m, solution: Dict[str, Set[int]]):
         """Add allocated amenities to map."""
-        amenity_icons = {
-            'grocery': 'shopping-cart',
-            'restaurant': 'cutlery',
-            'school': 'book',
-            'healthcare': 'plus-sign'
-        }
+        import folium
+        
+        # Flatten solution so every node is resolved by one query in one session
+        allocations = [(amenity_type, node_id)
+                       for amenity_type, node_ids in solution.items()
+                       for node_id in node_ids]
+        coords = self._fetch_coords(
+            'candidate_locations', {node_id for _, node_id in allocations}
+        )
         
-        for amenity_type, node_ids in solution.items():
-            for node_id in node_ids:
-                with self.db.get_session() as session:
-                    query = """
-                        SELECT cl.latitude, cl.longitude
-                        FROM candidate_locations cl
-                        WHERE cl.node_id = :node_id
-                    """
-                    result = session.execute(text(query), {'node_id': node_id})
-                    row = result.fetchone()
-                    
-                    if row:
-                        lat, lon = row
-                        icon = amenity_icons.get(amenity_type, 'star')
-                        
-                        folium.Marker(
-                            location=[lat, lon],
-                            icon=folium.Icon(color='green', icon=icon, prefix='glyphicon'),
-                            popup=f"NEW {amenity_type}"
-                        ).add_to(m)
+        # One GeoJSON layer per amenity type (the marker icon is per layer)
+        features_by_type: Dict[str, list] = {}
+        for amenity_type, node_id in allocations:
+            if node_id not in coords:
+                continue
+            
+            lat, lon = coords[node_id]
+            features_by_type.setdefault(amenity_type, []).append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [float(lon), float(lat)]},
+                "properties": {"popup": f"NEW {amenity_type}"}
+            })
+        
+        for amenity_type, features in features_by_type.items():
+            icon = _AMENITY_ICONS.get(amenity_type, 'star')
+            
+            folium.GeoJson(
+                {"type": "FeatureCollection", "features": features},
+                name=f"New {amenity_type}",
+                marker=folium.Marker(
+                    icon=folium.Icon(color='green', icon=icon, prefix='glyphicon')
+                ),
+                popup=folium.GeoJsonPopup(fields=['popup'], labels=False)
+            ).add_to(m)
     
     def plot_comparison_map(self, baseline_scores: Dict[int, float],
                            optimized_scores: Dict[int, float],
@@ -187,6 +272,8 @@ class MapPlotter:
             solution: Allocation solution
             output_file: Output HTML file
         """
+        from folium import plugins
+        
         print(f"Creating comparison map...")
         
         # Create dual map
@@ -196,37 +283,17 @@ class MapPlotter:
             tiles='OpenStreetMap'
         )
         
+        # Both scenarios score the same residences: resolve coordinates once
+        coords = self._fetch_coords('residential_locations',
+                                    baseline_scores.keys() | optimized_scores.keys())
+        
         # Left map: Baseline
-        heat_data_baseline = []
-        for residential_id, score in baseline_scores.items():
-            with self.db.get_session() as session:
-                query = """
-                    SELECT latitude, longitude FROM residential_locations 
-                    WHERE node_id = :node_id
-                """
-                result = session.execute(text(query), {'node_id': residential_id})
-                row = result.fetchone()
-                
-                if row:
-                    lat, lon = row
-                    heat_data_baseline.append([lat, lon, score/100.0])
+        heat_data_baseline = self._build_heat_data(baseline_scores, coords)
         
         plugins.HeatMap(heat_data_baseline, name="Baseline").add_to(m.m1)
         
         # Right map: Optimized
-        heat_data_optimized = []
-        for residential_id, score in optimized_scores.items():
-            with self.db.get_session() as session:
-                query = """
-                    SELECT latitude, longitude FROM residential_locations 
-                    WHERE node_id = :node_id
-                """
-                result = session.execute(text(query), {'node_id': residential_id})
-                row = result.fetchone()
-                
-                if row:
-                    lat, lon = row
-                    heat_data_optimized.append([lat, lon, score/100.0])
+        heat_data_optimized = self._build_heat_data(optimized_scores, coords)
         
         plugins.HeatMap(heat_data_optimized, name="Optimized").add_to(m.m2)
         
@@ -238,34 +305,66 @@ class MapPlotter:
         
         return m
     
-    def plot_network_graph(self, output_file: str = "network_graph.html"):
-        """Plot pedestrian network graph."""
+    def plot_network_graph(self, output_file: str = "network_graph.html",
+                           max_edges: Optional[int] = None):
+        """
+        Plot pedestrian network graph.
+        
+        Args:
+            output_file: Output HTML file
+            max_edges: Maximum number of edges to draw
+                (default: MAX_NETWORK_EDGES)
+        """
+        import folium
+        
         print(f"Creating network graph...")
         
+        if max_edges is None:
+            max_edges = self.MAX_NETWORK_EDGES
+        
         m = self.create_base_map()
         
-        # Add edges
         with self.db.get_session() as session:
+            total_edges = session.execute(
+                text("SELECT count(*) FROM network_edges")
+            ).scalar()
+            n_edges = min(total_edges, max_edges)
+            if n_edges < total_edges:
+                print(f"  Drawing {n_edges:,} of {total_edges:,} edges")
+            
+            # Edges streamed through a server-side cursor into a preallocated array
+            segments = np.empty((n_edges, 2, 2), dtype=np.float64)
             query = """
-                SELECT e.source_node, e.target_node, e.length,
-                       n1.latitude as lat1, n1.longitude as lon1,
+                SELECT n1.latitude as lat1, n1.longitude as lon1,
                        n2.latitude as lat2, n2.longitude as lon2
                 FROM network_edges e
                 JOIN network_nodes n1 ON e.source_node = n1.node_id
                 JOIN network_nodes n2 ON e.target_node = n2.node_id
-                LIMIT 1000
+                LIMIT :limit
             """
-            result = session.execute(text(query))
+            result = session.execute(
+                text(query).execution_options(stream_results=True,
+                                              yield_per=self.EDGE_CHUNK_SIZE),
+                {'limit': n_edges}
+            )
             
-            for row in result:
-                source, target, length, lat1, lon1, lat2, lon2 = row
-                
-                folium.PolyLine(
-                    locations=[[lat1, lon1], [lat2, lon2]],
-                    color='blue',
-                    weight=1,
-                    opacity=0.3
-                ).add_to(m)
+            filled = 0
+            for chunk in result.partitions():
+                # Guard against edges inserted after the count
+                chunk = chunk[:n_edges - filled]
+                segments[filled:filled + len(chunk)] = np.array(
+                    chunk, dtype=np.float64).reshape(-1, 2, 2)
+                filled += len(chunk)
+            segments = segments[:filled]
+        
+        # Single multi-segment PolyLine instead of one layer per edge
+        if len(segments):
+            folium.PolyLine(
+                locations=segments.tolist(),
+                color='blue',
+                weight=1,
+                opacity=0.3
+            ).add_to(m)
         
         m.save(output_file)
         print(f"  ✓ Network graph saved to {output_file}")
@@ -276,27 +375,47 @@ class MapPlotter:
 class StatisticsPlotter:
     """Create statistical plots for analysis."""
     
+    # Scatter panels are randomly subsampled above this many points
+    MAX_SCATTER_POINTS = 20000
+    
     def __init__(self):
         """Initialize statistics plotter."""
+        # Plotting libraries are imported on first use to keep module import cheap
+        # Backend selection is left to the entry point (see scripts/run_pipeline.py)
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
         sns.set_style("whitegrid")
         plt.rcParams['figure.figsize'] = (12, 8)
     
-    def plot_walkscore_distribution(self, scores: Dict[int, float],
+    def plot_walkscore_distribution(self, scores: Dict[int, float], stats: Dict,
                                    output_file: str = "walkscore_distribution.png"):
-        """Plot WalkScore distribution histogram."""
+        """
+        Plot WalkScore distribution histogram.
+        
+        Args:
+            scores: WalkScores {residential_id: score}
+            stats: WalkScoreCalculator.get_statistics(scores)
+            output_file: Output image file
+        """
+        import matplotlib.pyplot as plt
+        
         print(f"Creating WalkScore distribution plot...")
         
         fig, axes = plt.subplots(2, 2, figsize=(14, 10))
         
-        score_values = list(scores.values())
+        score_values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        mean_score = stats['mean']
+        above_50 = stats['scores_above_50']
+        above_75 = stats['scores_above_75']
         
         # Histogram
         axes[0, 0].hist(score_values, bins=50, edgecolor='black', alpha=0.7)
         axes[0, 0].set_xlabel('WalkScore')
         axes[0, 0].set_ylabel('Frequency')
         axes[0, 0].set_title('WalkScore Distribution')
-        axes[0, 0].axvline(np.mean(score_values), color='red', linestyle='--', 
-                          label=f'Mean: {np.mean(score_values):.2f}')
+        axes[0, 0].axvline(mean_score, color='red', linestyle='--', 
+                          label=f'Mean: {mean_score:.2f}')
         axes[0, 0].legend()
         
         # Box plot
@@ -307,7 +426,7 @@ class StatisticsPlotter:
         # CDF
         sorted_scores = np.sort(score_values)
         cdf = np.arange(1, len(sorted_scores) + 1) / len(sorted_scores)
-        axes[1, 0].plot(sorted_scores, cdf)
+        axes[1, 0].plot(sorted_scores, cdf, rasterized=True)
         axes[1, 0].set_xlabel('WalkScore')
         axes[1, 0].set_ylabel('Cumulative Probability')
         axes[1, 0].set_title('Cumulative Distribution Function')
@@ -316,17 +435,17 @@ class StatisticsPlotter:
         # Statistics table
         stats_text = f"""
         Statistics:
-        Mean: {np.mean(score_values):.2f}
-        Median: {np.median(score_values):.2f}
-        Std: {np.std(score_values):.2f}
-        Min: {np.min(score_values):.2f}
-        Max: {np.max(score_values):.2f}
-        Q25: {np.percentile(score_values, 25):.2f}
-        Q75: {np.percentile(score_values, 75):.2f}
+        Mean: {mean_score:.2f}
+        Median: {stats['median']:.2f}
+        Std: {stats['std']:.2f}
+        Min: {stats['min']:.2f}
+        Max: {stats['max']:.2f}
+        Q25: {stats['q25']:.2f}
+        Q75: {stats['q75']:.2f}
         
         Coverage:
-        Score ≥ 50: {sum(1 for s in score_values if s >= 50)} ({100*sum(1 for s in score_values if s >= 50)/len(score_values):.1f}%)
-        Score ≥ 75: {sum(1 for s in score_values if s >= 75)} ({100*sum(1 for s in score_values if s >= 75)/len(score_values):.1f}%)
+        Score ≥ 50: {above_50} ({100*above_50/len(score_values):.1f}%)
+        Score ≥ 75: {above_75} ({100*above_75/len(score_values):.1f}%)
         """
         axes[1, 1].text(0.1, 0.5, stats_text, fontsize=12, verticalalignment='center',
                        family='monospace')
@@ -340,16 +459,32 @@ class StatisticsPlotter:
     
     def plot_comparison(self, baseline_scores: Dict[int, float],
                        optimized_scores: Dict[int, float],
+                       baseline_stats: Dict, optimized_stats: Dict,
                        output_file: str = "comparison.png"):
-        """Plot before/after comparison."""
+        """
+        Plot before/after comparison.
+        
+        Args:
+            baseline_scores: Baseline WalkScores {residential_id: score}
+            optimized_scores: Optimized WalkScores {residential_id: score}
+            baseline_stats: WalkScoreCalculator.get_statistics(baseline_scores)
+            optimized_stats: WalkScoreCalculator.get_statistics(optimized_scores)
+            output_file: Output image file
+        """
+        import matplotlib.pyplot as plt
+        
         print(f"Creating comparison plot...")
         
         fig, axes = plt.subplots(2, 2, figsize=(14, 10))
         
-        baseline_values = list(baseline_scores.values())
-        optimized_values = list(optimized_scores.values())
-        improvements = [optimized_scores[rid] - baseline_scores[rid] 
-                       for rid in baseline_scores.keys()]
+        # Align both scenarios on the baseline residential ids
+        residential_ids = np.fromiter(baseline_scores.keys(), dtype=np.int64,
+                                      count=len(baseline_scores))
+        baseline_values = np.array([baseline_scores[rid] for rid in residential_ids],
+                                   dtype=np.float64)
+        optimized_values = np.array([optimized_scores[rid] for rid in residential_ids],
+                                    dtype=np.float64)
+        improvements = optimized_values - baseline_values
         
         # Side-by-side histogram
         axes[0, 0].hist([baseline_values, optimized_values], bins=30, 
@@ -364,12 +499,17 @@ class StatisticsPlotter:
         axes[0, 1].set_xlabel('WalkScore Improvement')
         axes[0, 1].set_ylabel('Frequency')
         axes[0, 1].set_title('Improvement Distribution')
-        axes[0, 1].axvline(np.mean(improvements), color='red', linestyle='--',
-                          label=f'Mean: {np.mean(improvements):.2f}')
+        axes[0, 1].axvline(improvements.mean(), color='red', linestyle='--',
+                          label=f'Mean: {improvements.mean():.2f}')
         axes[0, 1].legend()
         
-        # Scatter plot
-        axes[1, 0].scatter(baseline_values, optimized_values, alpha=0.3)
+        # Scatter plot (rasterized, capped at MAX_SCATTER_POINTS for large cities)
+        scatter_idx = np.arange(len(baseline_values))
+        if len(scatter_idx) > self.MAX_SCATTER_POINTS:
+            rng = np.random.default_rng(0)
+            scatter_idx = rng.choice(scatter_idx, self.MAX_SCATTER_POINTS, replace=False)
+        axes[1, 0].scatter(baseline_values[scatter_idx], optimized_values[scatter_idx],
+                           alpha=0.3, s=3, rasterized=True)
         axes[1, 0].plot([0, 100], [0, 100], 'r--', label='No change')
         axes[1, 0].set_xlabel('Baseline WalkScore')
         axes[1, 0].set_ylabel('Optimized WalkScore')
@@ -381,19 +521,19 @@ class StatisticsPlotter:
         Comparison Statistics:
         
         Baseline:
-          Mean: {np.mean(baseline_values):.2f}
-          Median: {np.median(baseline_values):.2f}
-          Coverage ≥50: {100*sum(1 for s in baseline_values if s >= 50)/len(baseline_values):.1f}%
+          Mean: {baseline_stats['mean']:.2f}
+          Median: {baseline_stats['median']:.2f}
+          Coverage ≥50: {100*baseline_stats['scores_above_50']/baseline_stats['count']:.1f}%
         
         Optimized:
-          Mean: {np.mean(optimized_values):.2f}
-          Median: {np.median(optimized_values):.2f}
-          Coverage ≥50: {100*sum(1 for s in optimized_values if s >= 50)/len(optimized_values):.1f}%
+          Mean: {optimized_stats['mean']:.2f}
+          Median: {optimized_stats['median']:.2f}
+          Coverage ≥50: {100*optimized_stats['scores_above_50']/optimized_stats['count']:.1f}%
         
         Improvement:
-          Mean: {np.mean(improvements):.2f}
-          Total increase: {sum(improvements):.2f}
-          % improved: {100*sum(1 for i in improvements if i > 0)/len(improvements):.1f}%
+          Mean: {improvements.mean():.2f}
+          Total increase: {improvements.sum():.2f}
+          % improved: {100*int((improvements > 0).sum())/len(improvements):.1f}%
         """
         axes[1, 1].text(0.1, 0.5, comparison_text, fontsize=11, verticalalignment='center',
                        family='monospace')
@@ -408,6 +548,8 @@ class StatisticsPlotter:
     def plot_convergence(self, history: List[float],
                         output_file: str = "convergence.png"):
         """Plot optimization convergence."""
+        import matplotlib.pyplot as plt
+        
         print(f"Creating convergence plot...")
         
         plt.figure(figsize=(12, 6))
@@ -6,20 +6,197 @@ allocated facilities, and WalkScore heatmaps.
 import folium
 from folium import plugins
 import pandas as pd
+import geopandas as gpd
 import numpy as np
 from typing import Dict, Set, List, Tuple, Optional
-import yaml
 import osmnx as ox
-from sqlalchemy import text
+import shapely
+from sqlalchemy import text, bindparam
 from src.network.pedestrian_graph import PedestrianGraph
 from src.scoring.walkscore import WalkScoreCalculator
-from src.utils.database import get_db_manager
+from src.utils.database import get_db_manager, load_config
 from src.data_collection.balikesir_center import get_balikesir_center_polygon
 
 
+# Shared marker HTML for allocated amenities (a red Font Awesome star)
+_ALLOCATED_STAR_HTML = '<i class="fa fa-star" style="color:#e74c3c;font-size:18px;"></i>'
+
+# Leaflet.markercluster options for the large point layers: add markers in
+# chunks so the page stays responsive while they load
+_CLUSTER_OPTIONS = {
+    'chunkedLoading': True
+}
+
+# Unlimited point layers at least this large are split into one toggleable
+# layer per map tile (at the configured zoom level)
+_TILE_LAYER_MIN_POINTS = 5000
+
+# Marker colors per amenity type (existing: greens/blues, allocated: reds/oranges)
+_EXISTING_AMENITY_COLORS = {
+    'grocery': '#2ecc71',
+    'restaurant': '#3498db',
+    'school': '#9b59b6'
+}
+_ALLOCATED_AMENITY_COLORS = {
+    'grocery': '#e74c3c',
+    'restaurant': '#e67e22',
+    'school': '#c0392b'
+}
+
+# WalkScore heatmap gradient (low = blue, high = red)
+_HEAT_GRADIENT = {
+    0.0: 'blue',
+    0.3: 'cyan',
+    0.5: 'lime',
+    0.7: 'yellow',
+    1.0: 'red'
+}
+
+_LEGEND_HTML = '''
+<div style="position: fixed; 
+             bottom: 50px; left: 50px; width: 200px; height: 150px; 
+             background-color: white; border:2px solid grey; z-index:9999; 
+             font-size:14px; padding: 10px">
+<h4>Legend</h4>
+<p><span style="color:blue;">●</span> Residential</p>
+<p><span style="color:green;">●</span> Existing Amenity</p>
+<p><span style="color:red;">★</span> Allocated Amenity</p>
+<p><span style="color:orange;">●</span> Candidate Location</p>
+</div>
+'''
+
+
+def _circle_marker_callback(radius: float, color: str, fill_color: str,
+                            fill_opacity: float, popup: str, weight: float = 3) -> str:
+    """Build a FastMarkerCluster callback that draws each [lat, lon] row as a circleMarker."""
+    return f"""
+    function (row) {{
+        var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {{
+            radius: {radius}, color: '{color}', weight: {weight},
+            fillColor: '{fill_color}', fillOpacity: {fill_opacity}
+        }});
+        marker.bindPopup('{popup}');
+        return marker;
+    }};
+    """
+
+
+def _tile_groups(coords: np.ndarray, zoom: int) -> List[Tuple[Tuple[int, int], np.ndarray]]:
+    """
+    Split [lat, lon] rows into Web Mercator (slippy map) tiles at a zoom level.
+    
+    An STRtree over the points answers one bulk query against the boxes of
+    every tile covering their extent; a point on a shared tile edge goes to
+    the first tile that holds it.
+    
+    Returns:
+        List of ((tile_x, tile_y), rows) for the non-empty tiles
+    """
+    n = 2 ** zoom
+    lats, lons = coords[:, 0], coords[:, 1]
+    
+    def tile_x(lon):
+        return int(np.floor((lon + 180.0) / 360.0 * n))
+    
+    def tile_y(lat):
+        return int(np.floor((1.0 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2.0 * n))
+    
+    xs = np.arange(tile_x(lons.min()), tile_x(lons.max()) + 1)
+    ys = np.arange(tile_y(lats.max()), tile_y(lats.min()) + 1)
+    grid_x, grid_y = (a.ravel() for a in np.meshgrid(xs, ys, indexing='ij'))
+    
+    # Tile edges in degrees (y grows southwards)
+    west = grid_x / n * 360.0 - 180.0
+    east = (grid_x + 1) / n * 360.0 - 180.0
+    north = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * grid_y / n))))
+    south = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (grid_y + 1) / n))))
+    
+    tree = shapely.STRtree(shapely.points(lons, lats))
+    tile_idx, point_idx = tree.query(shapely.box(west, south, east, north),
+                                     predicate='intersects')
+    point_idx, first = np.unique(point_idx, return_index=True)
+    tile_idx = tile_idx[first]
+    
+    order = np.argsort(tile_idx, kind='stable')
+    tiles, starts = np.unique(tile_idx[order], return_index=True)
+    return [((int(grid_x[t]), int(grid_y[t])), coords[point_idx[rows]])
+            for t, rows in zip(tiles, np.split(order, starts[1:]))]
+
+
+def _grid_aggregate(points: np.ndarray, cell: float) -> np.ndarray:
+    """
+    Bin [lat, lon, weight] rows into a uniform grid.
+    
+    Returns one row per non-empty cell: mean lat, mean lon and the summed
+    weight, which Leaflet.heat renders like the individual points it replaces.
+    """
+    if len(points) == 0:
+        return points
+    
+    cells = np.floor((points[:, :2] - points[:, :2].min(axis=0)) / cell).astype(np.int64)
+    _, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    
+    return np.column_stack([
+        np.bincount(inverse, weights=points[:, 0]) / counts,
+        np.bincount(inverse, weights=points[:, 1]) / counts,
+        np.bincount(inverse, weights=points[:, 2])
+    ])
+
+
+def _save_map(m: folium.Map, output_path: str):
+    """
+    Write a folium map to HTML one element at a time.
+    
+    folium's Map.save renders the whole page into a single string before
+    writing it, so large marker layers briefly cost twice the page size in
+    memory. Here every header/body/script element is rendered and written
+    on its own, so the peak is the largest single layer. Paths ending in
+    '.gz' are gzip-compressed on write.
+    
+    Args:
+        m: Map to save
+        output_path: Target HTML file ('.html' or '.html.gz')
+    """
+    import os
+    import gzip
+    
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    # Same first pass as Figure.render: elements register their header,
+    # html and script parts on the root figure
+    figure = m.get_root()
+    for child in figure._children.values():
+        child.render()
+    
+    opener = gzip.open if output_path.endswith('.gz') else open
+    with opener(output_path, 'wt', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head>\n')
+        title = getattr(figure, 'title', None)
+        if title:
+            f.write(f'<title>{title}</title>\n')
+        for element in figure.header._children.values():
+            f.write(element.render())
+        f.write('\n</head>\n<body>\n')
+        for element in figure.html._children.values():
+            f.write(element.render())
+        f.write('\n</body>\n<script>\n')
+        for element in figure.script._children.values():
+            f.write(element.render())
+        f.write('\n</script>\n</html>\n')
+
+
 class MapVisualizer:
     """Creates interactive maps for walkability visualization."""
     
+    # Rows per server-side cursor fetch when streaming large result sets
+    STREAM_CHUNK_SIZE = 1000
+    
+    # Heatmap grid cell size in degrees (~50 m), well below the heat radius
+    HEATMAP_CELL_DEGREES = 0.0005
+    
     def __init__(self, graph: PedestrianGraph, scorer: WalkScoreCalculator,
                  config_path: str = "config.yaml"):
         """Initialize map visualizer."""
@@ -28,23 +205,98 @@ class MapVisualizer:
         self.db = graph.db
         
         # Load configuration
-        with open(config_path, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config(config_path)
         
         viz_config = self.config['visualization']
         self.map_center = viz_config['map_center']
         self.zoom_level = viz_config['zoom_level']
         self.colors = viz_config['colors']
+        
+        # residential_id -> snapped network node, for O(1) marker lookups
+        self._res_to_snapped = {rid: sid for rid, sid in self.graph.residential_buildings}
+        
+        # OSM building centroids and existing amenity rows are identical for
+        # every map variant: load them once per visualizer
+        self._buildings_cache: Optional[np.ndarray] = None
+        self._amenities_cache: Optional[List[tuple]] = None
+        
+        # node_id -> (node_lat, node_lon), the fallback for missing original coordinates
+        self._node_coords_df: Optional[pd.DataFrame] = None
     
     def create_base_map(self) -> folium.Map:
         """Create base map centered on Balıkesir."""
         m = folium.Map(
             location=[self.map_center['latitude'], self.map_center['longitude']],
             zoom_start=self.zoom_level,
-            tiles=self.config['visualization']['tile_layer']
+            tiles=self.config['visualization']['tile_layer'],
+            prefer_canvas=True  # Draw vector markers on one canvas instead of SVG nodes
         )
         return m
     
+    def _stream_partitions(self, session, query: str, params: Optional[dict] = None):
+        """Execute query on a server-side cursor and yield lists of STREAM_CHUNK_SIZE rows."""
+        statement = text(query).execution_options(stream_results=True,
+                                                  yield_per=self.STREAM_CHUNK_SIZE)
+        return session.execute(statement, params or {}).partitions()
+    
+    def _node_coords(self) -> pd.DataFrame:
+        """
+        Load network node coordinates once, indexed by node_id.
+        
+        Call this before opening a streaming session: loading inside an open
+        stream would run on the same thread-local session as its cursor.
+        """
+        if self._node_coords_df is None:
+            with self.db.get_session() as session:
+                query = "SELECT node_id, latitude AS node_lat, longitude AS node_lon FROM nodes"
+                nodes_df = pd.read_sql(text(query), session.connection(), index_col='node_id')
+            self._node_coords_df = nodes_df.astype(float)
+        return self._node_coords_df
+    
+    @staticmethod
+    def _with_node_coords(df: pd.DataFrame, node_col: str, nodes: pd.DataFrame,
+                          how: str = 'inner') -> pd.DataFrame:
+        """
+        Add display 'lat'/'lon' columns to rows with original_latitude/original_longitude.
+        
+        Equivalent to JOIN nodes + COALESCE(original, node) in SQL, but served
+        from the cached node table (see _node_coords) so each query only reads
+        its own table.
+        """
+        merged = df.merge(nodes, how=how, left_on=node_col, right_index=True)
+        merged['lat'] = merged['original_latitude'].astype(float).fillna(merged['node_lat'])
+        merged['lon'] = merged['original_longitude'].astype(float).fillna(merged['node_lon'])
+        return merged
+    
+    def _add_point_clusters(self, m: folium.Map, coords: np.ndarray, name: str,
+                            callback: str, tiled: bool = False):
+        """
+        Add [lat, lon] rows to the map as clustered circle markers.
+        
+        With tiled=True and at least _TILE_LAYER_MIN_POINTS rows, the points
+        are split into one FeatureGroup per map tile at the default zoom
+        level (see _tile_groups), each listed in the LayerControl so areas
+        can be switched off; otherwise they form a single clustered layer.
+        """
+        if not tiled or len(coords) < _TILE_LAYER_MIN_POINTS:
+            plugins.FastMarkerCluster(
+                data=coords.tolist(),
+                name=name,
+                options=_CLUSTER_OPTIONS,
+                callback=callback
+            ).add_to(m)
+            return
+        
+        for (x, y), tile_coords in _tile_groups(coords, self.zoom_level):
+            layer = folium.FeatureGroup(name=f"{name} (tile {x}/{y})")
+            plugins.FastMarkerCluster(
+                data=tile_coords.tolist(),
+                options=_CLUSTER_OPTIONS,
+                callback=callback,
+                control=False
+            ).add_to(layer)
+            layer.add_to(m)
+    
     def add_residential_locations(self, m: folium.Map, max_points: Optional[int] = None):
         """Add residential locations to map.
         
@@ -53,93 +305,73 @@ class MapVisualizer:
         """
         print("Adding residential locations to map...")
         
+        nodes = self._node_coords()
+        
         # Load residential locations from DB (use original coordinates for display)
         with self.db.get_session() as session:
             query = """
-                SELECT rl.residential_id,
-                       COALESCE(rl.original_latitude, n.latitude) AS lat,
-                       COALESCE(rl.original_longitude, n.longitude) AS lon
+                SELECT rl.residential_id, rl.snapped_node_id,
+                       rl.original_latitude, rl.original_longitude
                 FROM residential_locations rl
-                JOIN nodes n ON n.node_id = rl.snapped_node_id
+                WHERE rl.snapped_node_id IS NOT NULL
                 ORDER BY rl.residential_id
             """
             if max_points is not None:
                 query += f" LIMIT {max_points}"
             
-            result = session.execute(text(query))
+            columns = ['residential_id', 'snapped_node_id',
+                       'original_latitude', 'original_longitude']
             residential_coords = []
-            for row in result:
-                res_id, lat, lon = row
-                if lat and lon:
-                    residential_coords.append([float(lat), float(lon)])
+            for chunk in self._stream_partitions(session, query):
+                rows = self._with_node_coords(pd.DataFrame(chunk, columns=columns),
+                                              'snapped_node_id', nodes)
+                residential_coords.extend(rows[['lat', 'lon']].dropna().to_numpy().tolist())
         
         if residential_coords:
-            # Add markers
-            for lat, lon in residential_coords:
-                folium.CircleMarker(
-                    location=[lat, lon],
+            # Clustered layer(s) fed with the whole coordinate array
+            self._add_point_clusters(
+                m, np.asarray(residential_coords, dtype=np.float64), "Residential",
+                callback=_circle_marker_callback(
                     radius=3,
-                    popup="Residential",
                     color=self.colors['residential'],
-                    fill=True,
-                    fillColor=self.colors['residential'],
-                    fillOpacity=0.6
-                ).add_to(m)
+                    fill_color=self.colors['residential'],
+                    fill_opacity=0.6,
+                    popup="Residential"
+                ),
+                tiled=max_points is None
+            )
         
         print(f"Added {len(residential_coords)} residential locations")
     
     def add_all_buildings(self, m: folium.Map, max_points: Optional[int] = None):
         """Add all buildings (residential + commercial + industrial + etc.) to map.
         
-        Loads all buildings from OSM within the Balıkesir center polygon.
+        Loads all buildings from OSM within the Balıkesir center polygon
+        (fetched once per visualizer and reused by every map variant).
         """
-        print("Loading all buildings from OSM...")
-        
         try:
-            center_poly = get_balikesir_center_polygon()
-            tags = {"building": True}
-            
-            try:
-                gdf = ox.features_from_polygon(center_poly, tags=tags)
-            except AttributeError:
-                gdf = ox.geometries_from_polygon(center_poly, tags=tags)
-            
-            if len(gdf) == 0:
+            building_coords = self._load_building_centroids()
+            if len(building_coords) == 0:
                 print("No buildings found in center polygon.")
                 return
             
-            # Extract centroids for point locations
-            # Extract centroids for point locations
-            # Project to Web Mercator (EPSG:3857) for accurate centroid calculation
-            if gdf.crs is None:
-                gdf.set_crs(epsg=4326, inplace=True) # Assume 4326 if None
-            
-            gdf_proj = gdf.to_crs(epsg=3857)
-            gdf["geometry"] = gdf_proj.geometry.centroid.to_crs(epsg=4326)
-            gdf = gdf[gdf.geometry.type == "Point"]
-            
             if max_points is not None:
-                gdf = gdf.head(max_points)
+                building_coords = building_coords[:max_points]
             
-            building_coords = []
-            for idx, row in gdf.iterrows():
-                geom = row.geometry
-                if geom and hasattr(geom, 'y') and hasattr(geom, 'x'):
-                    building_coords.append([geom.y, geom.x])
-            
-            if building_coords:
-                # Add all buildings as light gray markers
-                for lat, lon in building_coords:
-                    folium.CircleMarker(
-                        location=[lat, lon],
+            if len(building_coords):
+                # Add all buildings as light gray clustered markers
+                self._add_point_clusters(
+                    m, building_coords, "Buildings",
+                    callback=_circle_marker_callback(
                         radius=2,
-                        popup="Building",
                         color='#888888',
-                        fill=True,
-                        fillColor='#cccccc',
-                        fillOpacity=0.4,
+                        fill_color='#cccccc',
+                        fill_opacity=0.4,
+                        popup="Building",
                         weight=0.5
-                    ).add_to(m)
+                    ),
+                    tiled=max_points is None
+                )
             
             print(f"Added {len(building_coords)} buildings to map")
             
@@ -148,46 +380,83 @@ class MapVisualizer:
             # Fallback: just show residential if all buildings fails
             pass
     
+    def _load_building_centroids(self) -> np.ndarray:
+        """Load OSM building centroids as an (N, 2) [lat, lon] array, cached per visualizer."""
+        if self._buildings_cache is not None:
+            return self._buildings_cache
+        
+        print("Loading all buildings from OSM...")
+        
+        center_poly = get_balikesir_center_polygon()
+        tags = {"building": True}
+        
+        try:
+            gdf = ox.features_from_polygon(center_poly, tags=tags)
+        except AttributeError:
+            gdf = ox.geometries_from_polygon(center_poly, tags=tags)
+        
+        if len(gdf) == 0:
+            self._buildings_cache = np.empty((0, 2), dtype=np.float64)
+            return self._buildings_cache
+        
+        # Extract centroids for point locations
+        # Project to Web Mercator (EPSG:3857) for accurate centroid calculation
+        if gdf.crs is None:
+            gdf.set_crs(epsg=4326, inplace=True) # Assume 4326 if None
+        
+        centroids = gdf.to_crs(epsg=3857).geometry.centroid.to_crs(epsg=4326)
+        
+        # Vectorized filtering and coordinate extraction, no per-row Python access
+        mask = (centroids.geom_type.values == "Point") & ~centroids.is_empty.values
+        xy = shapely.get_coordinates(centroids.values[mask])
+        self._buildings_cache = xy[:, ::-1].copy()  # (lon, lat) -> (lat, lon)
+        return self._buildings_cache
+    
+    def _load_existing_amenities(self) -> List[tuple]:
+        """Load (type_name, lat, lon, name) rows for existing amenities, cached per visualizer."""
+        if self._amenities_cache is None:
+            nodes = self._node_coords()
+            with self.db.get_session() as session:
+                # Get amenities with original coordinates
+                query = """
+                    SELECT at.type_name, ea.node_id,
+                           ea.original_latitude, ea.original_longitude, ea.name
+                    FROM existing_amenities ea
+                    JOIN amenity_types at ON at.amenity_type_id = ea.amenity_type_id
+                """
+                columns = ['type_name', 'node_id', 'original_latitude',
+                           'original_longitude', 'name']
+                self._amenities_cache = []
+                for chunk in self._stream_partitions(session, query):
+                    rows = self._with_node_coords(pd.DataFrame(chunk, columns=columns),
+                                                  'node_id', nodes)
+                    rows = rows.dropna(subset=['lat', 'lon'])
+                    self._amenities_cache.extend(
+                        zip(rows['type_name'], rows['lat'], rows['lon'], rows['name'])
+                    )
+        return self._amenities_cache
+    
     def add_existing_amenities(self, m: folium.Map):
         """Add existing amenities to map (using original coordinates)."""
         print("Adding existing amenities to map...")
         
-        amenity_colors = {
-            'grocery': '#2ecc71',
-            'restaurant': '#3498db',
-            'school': '#9b59b6'
-        }
-        
-        with self.db.get_session() as session:
-            # Get amenities with original coordinates
-            query = """
-                SELECT at.type_name, ea.node_id,
-                       COALESCE(ea.original_latitude, n.latitude) AS lat,
-                       COALESCE(ea.original_longitude, n.longitude) AS lon,
-                       ea.name
-                FROM existing_amenities ea
-                JOIN amenity_types at ON at.amenity_type_id = ea.amenity_type_id
-                JOIN nodes n ON n.node_id = ea.node_id
-            """
-            result = session.execute(text(query))
+        layer = folium.FeatureGroup(name="Existing amenities")
+        for amenity_type, lat, lon, name in self._load_existing_amenities():
+            color = _EXISTING_AMENITY_COLORS.get(amenity_type, self.colors['existing_amenity'])
+            popup_text = f"Existing {amenity_type}"
+            if name:
+                popup_text += f": {name}"
             
-            for row in result:
-                amenity_type, node_id, lat, lon, name = row
-                if lat and lon:
-                    color = amenity_colors.get(amenity_type, self.colors['existing_amenity'])
-                    popup_text = f"Existing {amenity_type}"
-                    if name:
-                        popup_text += f": {name}"
-                    
-                    folium.CircleMarker(
-                        location=[float(lat), float(lon)],
-                        radius=5,
-                        popup=popup_text,
-                        color=color,
-                        fill=True,
-                        fillColor=color,
-                        fillOpacity=0.8
-                    ).add_to(m)
+            folium.CircleMarker(
+                location=[lat, lon],
+                radius=5,
+                popup=popup_text,
+                color=color,
+                fill=True,
+                fillColor=color,
+                fillOpacity=0.8
+            ).add_to(layer)
+        layer.add_to(m)
         
         print("Added existing amenities")
     
@@ -197,39 +466,43 @@ class MapVisualizer:
         """Add allocated amenities from optimization solution (using original coordinates)."""
         print(f"Adding allocated amenities ({scenario}) to map...")
         
-        amenity_colors = {
-            'grocery': '#e74c3c',
-            'restaurant': '#e67e22',
-            'school': '#c0392b'
-        }
+        # CRITICAL: solution contains snapped_node_id, not node_id
+        snapped_ids = {sid for node_ids in solution.values() for sid in node_ids}
+        if not snapped_ids:
+            print("Added allocated amenities")
+            return
         
+        # Get original coordinates from candidate_locations for all ids at once
         with self.db.get_session() as session:
-            for amenity_type, node_ids in solution.items():
-                color = amenity_colors.get(amenity_type, self.colors['allocated_amenity'])
+            query = text("""
+                SELECT cl.snapped_node_id, cl.original_latitude, cl.original_longitude
+                FROM candidate_locations cl
+                WHERE cl.snapped_node_id IN :ids
+            """).bindparams(bindparam('ids', expanding=True))
+            result = session.execute(query, {'ids': tuple(snapped_ids)}).fetchall()
+        
+        rows = self._with_node_coords(
+            pd.DataFrame(result, columns=['snapped_node_id', 'original_latitude',
+                                          'original_longitude']),
+            'snapped_node_id', self._node_coords()
+        )
+        # Several candidates can share a snap node: keep the first one
+        rows = rows.drop_duplicates(subset='snapped_node_id')
+        coords = dict(zip(rows['snapped_node_id'], zip(rows['lat'], rows['lon'])))
+        
+        for amenity_type, node_ids in solution.items():
+            color = _ALLOCATED_AMENITY_COLORS.get(amenity_type, self.colors['allocated_amenity'])
+            
+            for snapped_node_id in node_ids:
+                lat, lon = coords.get(snapped_node_id, (None, None))
                 
-                # CRITICAL: solution contains snapped_node_id, not node_id
-                for snapped_node_id in node_ids:
-                    # Get original coordinates from candidate_locations
-                    query = """
-                        SELECT COALESCE(cl.original_latitude, n.latitude) AS lat,
-                               COALESCE(cl.original_longitude, n.longitude) AS lon
-                        FROM candidate_locations cl
-                        JOIN nodes n ON n.node_id = cl.snapped_node_id
-                        WHERE cl.snapped_node_id = :snapped_node_id
-                    """
-                    result = session.execute(text(query), {'snapped_node_id': snapped_node_id})
-                    row = result.first()
-                    
-                    lat, lon = None, None
-                    if row:
-                        lat, lon = row
-                    
-                    if lat and lon:
-                        folium.Marker(
-                            location=[float(lat), float(lon)],
-                            popup=f"Allocated {amenity_type} ({scenario})",
-                            icon=folium.Icon(color='red', icon='star', prefix='fa')
-                        ).add_to(m)
+                if lat and lon:
+                    folium.Marker(
+                        location=[float(lat), float(lon)],
+                        popup=f"Allocated {amenity_type} ({scenario})",
+                        icon=folium.DivIcon(html=_ALLOCATED_STAR_HTML,
+                                            icon_size=(18, 18), icon_anchor=(9, 9))
+                    ).add_to(m)
         
         print("Added allocated amenities")
     
@@ -247,12 +520,12 @@ class MapVisualizer:
             """
             result = session.execute(text(query), {'limit': max_points})
             
-            candidate_coords = []
-            for row in result:
-                candidate_coords.append([float(row[0]), float(row[1])])
+            # One fetch straight into an (N, 2) array instead of a per-row append
+            candidate_coords = np.asarray(result.fetchall(), dtype=np.float64).reshape(-1, 2)
         
-        if candidate_coords:
-            for lat, lon in candidate_coords:
+        if len(candidate_coords):
+            layer = folium.FeatureGroup(name="Candidate locations")
+            for lat, lon in candidate_coords.tolist():
                 folium.CircleMarker(
                     location=[lat, lon],
                     radius=4,
@@ -261,7 +534,8 @@ class MapVisualizer:
                     fill=True,
                     fillColor=self.colors['candidate_location'],
                     fillOpacity=0.5
-                ).add_to(m)
+                ).add_to(layer)
+            layer.add_to(m)
         
         print(f"Added {len(candidate_coords)} candidate locations")
     
@@ -269,25 +543,32 @@ class MapVisualizer:
         """Add WalkScore heatmap layer to map."""
         print(f"Adding WalkScore heatmap ({scenario})...")
         
+        nodes = self._node_coords()
+        
         # Load WalkScores from database
         with self.db.get_session() as session:
             query = """
                 SELECT ws.residential_id, ws.walkscore,
-                       COALESCE(rl.original_latitude, n.latitude) AS lat,
-                       COALESCE(rl.original_longitude, n.longitude) AS lon
+                       rl.original_latitude, rl.original_longitude
                 FROM walkability_scores ws
-                JOIN nodes n ON ws.residential_id = n.node_id
-                LEFT JOIN residential_locations rl ON rl.snapped_node_id = n.node_id
+                LEFT JOIN residential_locations rl ON rl.snapped_node_id = ws.residential_id
                 WHERE ws.scenario = :scenario
             """
-            result = session.execute(text(query), {'scenario': scenario})
-            
-            heat_data = []
-            for row in result:
-                residential_id, score, lat, lon = row
-                if lat and lon:
-                    # Weight by WalkScore (0-100 scale, normalize to 0-1)
-                    heat_data.append([float(lat), float(lon), float(score)/100.0])
+            columns = ['residential_id', 'walkscore', 'original_latitude', 'original_longitude']
+            chunks = []
+            for chunk in self._stream_partitions(session, query, {'scenario': scenario}):
+                rows = self._with_node_coords(pd.DataFrame(chunk, columns=columns),
+                                              'residential_id', nodes)
+                # Columns: lat, lon, weight (WalkScore 0-100 normalized to 0-1)
+                rows = rows[['lat', 'lon', 'walkscore']].astype(float).dropna().to_numpy()
+                rows[:, 2] /= 100.0
+                chunks.append(rows)
+        
+        heat_data = []
+        if chunks:
+            points = np.vstack(chunks)
+            heat_data = _grid_aggregate(points, self.HEATMAP_CELL_DEGREES).tolist()
+            print(f"Aggregated {len(points)} scores into {len(heat_data)} heatmap cells")
         
         if heat_data:
             # Create heatmap with gradient
@@ -297,13 +578,7 @@ class MapVisualizer:
                 max_zoom=18,
                 radius=15,
                 blur=20,
-                gradient={
-                    0.0: 'blue',
-                    0.3: 'cyan', 
-                    0.5: 'lime',
-                    0.7: 'yellow',
-                    1.0: 'red'
-                }
+                gradient=_HEAT_GRADIENT
             ).add_to(m)
             print(f"Added heatmap with {len(heat_data)} points")
         else:
@@ -326,23 +601,20 @@ class MapVisualizer:
             if score >= 50: return "#e67e22"  # Carrot
             return "#e74c3c"  # Alizarin
         
+        # Resolve each distinct snap node once (many buildings share one);
+        # coordinates come from the in-memory graph, no DB round-trip needed
+        snapped_ids = {self._res_to_snapped[rid] for rid in scores if rid in self._res_to_snapped}
+        coords = {sid: self.graph.get_node_coordinates(sid) for sid in snapped_ids}
+        
         # Add markers
+        layer = folium.FeatureGroup(name="Residential WalkScores")
         count = 0
         for residential_id, score in scores.items():
-            # Get coordinates
-            # optimization: look up from graph nodes if possible, or query db
-            # For speed, let's assume we can get coords from graph.N nodes?
-            # graph.residential_buildings has (res_id, snapped_id)
-            
             # Find the snapped node ID first
-            snapped_id = None
-            for rid, sid in self.graph.residential_buildings:
-                if rid == residential_id:
-                    snapped_id = sid
-                    break
+            snapped_id = self._res_to_snapped.get(residential_id)
             
             if snapped_id:
-                lat, lon = self.graph.get_node_coordinates(snapped_id)
+                lat, lon = coords[snapped_id]
                 if lat and lon:
                     color = get_color(score)
                     
@@ -355,9 +627,10 @@ class MapVisualizer:
                         fill_opacity=0.7,
                         popup=f"Score: {score:.1f}",
                         weight=0
-                    ).add_to(m)
+                    ).add_to(layer)
                     count += 1
-                    
+        
+        layer.add_to(m)
         print(f"Added {count} residential markers")
     
     def add_fifteen_minute_circles(self, m: folium.Map, 
@@ -368,19 +641,36 @@ class MapVisualizer:
         # 15 minutes = 1080 meters at 1.2 m/s
         radius_meters = self.config['walkscore']['fifteen_minutes_meters']
         
+        rows = []
         for amenity_type, node_ids in solution.items():
             for node_id in node_ids:
                 lat, lon = self.graph.get_node_coordinates(node_id)
                 if lat and lon:
-                    folium.Circle(
-                        location=[lat, lon],
-                        radius=radius_meters,
-                        popup=f"15-min radius: {amenity_type}",
-                        color='green',
-                        fill=True,
-                        fillColor='green',
-                        fillOpacity=0.1
-                    ).add_to(m)
+                    rows.append((f"15-min radius: {amenity_type}", float(lat), float(lon)))
+        
+        if not rows:
+            print("Added 15-minute radius circles")
+            return
+        
+        # Buffer in a local metric CRS, then merge each amenity type's circles
+        # into one (multi)polygon so the map gets a single GeoJSON layer
+        labels, lats, lons = zip(*rows)
+        points = gpd.GeoDataFrame({'label': labels},
+                                  geometry=gpd.points_from_xy(lons, lats), crs="EPSG:4326")
+        metric = points.to_crs(points.estimate_utm_crs())
+        metric["geometry"] = metric.geometry.buffer(radius_meters)
+        areas = metric.dissolve(by='label', as_index=False).to_crs(epsg=4326)
+        
+        folium.GeoJson(
+            areas.to_json(),
+            name="15-minute radius",
+            style_function=lambda feature: {
+                'color': 'green',
+                'fillColor': 'green',
+                'fillOpacity': 0.1
+            },
+            popup=folium.GeoJsonPopup(fields=['label'], labels=False)
+        ).add_to(m)
         
         print("Added 15-minute radius circles")
     
@@ -394,10 +684,11 @@ class MapVisualizer:
         self.add_existing_amenities(m)
         self.add_candidate_locations(m)
         
+        # Add layer control
+        folium.LayerControl().add_to(m)
+        
         # Save map
-        import os
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        m.save(output_path)
+        _save_map(m, output_path)
         print(f"Baseline map saved to {output_path}")
         
         return m
@@ -418,10 +709,11 @@ class MapVisualizer:
         # Add legend
         self._add_legend(m)
         
+        # Add layer control
+        folium.LayerControl().add_to(m)
+        
         # Save map
-        import os
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        m.save(output_path)
+        _save_map(m, output_path)
         print(f"Optimized map saved to {output_path}")
         
         return m
@@ -443,9 +735,7 @@ class MapVisualizer:
         self.add_residential_markers(m, baseline_scores)  # Colored dots by score!
         
         # Save
-        import os
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        m.save(output_path)
+        _save_map(m, output_path)
         print(f"Baseline heatmap saved to {output_path}")
         
         return m
@@ -471,9 +761,7 @@ class MapVisualizer:
         self.add_fifteen_minute_circles(m, solution)
         
         # Save
-        import os
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        m.save(output_path)
+        _save_map(m, output_path)
         print(f"Optimized heatmap saved to {output_path}")
         
         return m
@@ -499,28 +787,60 @@ class MapVisualizer:
         folium.LayerControl().add_to(m)
         
         # Save map
-        import os
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        m.save(output_path)
+        _save_map(m, output_path)
         print(f"Comparison map saved to {output_path}")
         
         return m
     
+    def render_all(self, solution: Dict[str, Set[int]], scenario: str = "optimized",
+                   output_dir: str = "visualizations", include_baseline: bool = True):
+        """
+        Render the baseline and optimized maps/heatmaps concurrently.
+        
+        Each map is independent and dominated by DB/OSM I/O, so the maps are
+        built in a thread pool. Shared inputs (OSM buildings, existing
+        amenities) are loaded up front so workers only read the caches; each
+        worker uses its own thread-local DB session.
+        
+        Args:
+            solution: Allocation solution {amenity_type: set of snapped_node_ids}
+            scenario: Scenario name used for score lookup and file names
+            output_dir: Directory for the HTML files
+            include_baseline: Also render baseline_map.html / baseline_heatmap.html
+        
+        Returns:
+            Dict mapping output path -> folium map
+        """
+        import os
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # Prime shared caches once, before any worker starts
+        try:
+            self._load_building_centroids()
+        except Exception as e:
+            print(f"Error loading all buildings: {e}")
+        self._node_coords()
+        self._load_existing_amenities()
+        
+        jobs = []
+        if include_baseline:
+            jobs.append((self.create_baseline_map, (),
+                         os.path.join(output_dir, "baseline_map.html")))
+            jobs.append((self.create_baseline_heatmap, (),
+                         os.path.join(output_dir, "baseline_heatmap.html")))
+        jobs.append((self.create_optimized_map, (solution, scenario),
+                     os.path.join(output_dir, f"{scenario}_map.html")))
+        jobs.append((self.create_optimized_heatmap, (solution, scenario),
+                     os.path.join(output_dir, f"{scenario}_heatmap.html")))
+        
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = {path: executor.submit(create, *args, output_path=path)
+                       for create, args, path in jobs}
+            return {path: future.result() for path, future in futures.items()}
+    
     def _add_legend(self, m: folium.Map):
         """Add legend to map."""
-        legend_html = '''
-        <div style="position: fixed; 
-                     bottom: 50px; left: 50px; width: 200px; height: 150px; 
-                     background-color: white; border:2px solid grey; z-index:9999; 
-                     font-size:14px; padding: 10px">
-        <h4>Legend</h4>
-        <p><span style="color:blue;">●</span> Residential</p>
-        <p><span style="color:green;">●</span> Existing Amenity</p>
-        <p><span style="color:red;">★</span> Allocated Amenity</p>
-        <p><span style="color:orange;">●</span> Candidate Location</p>
-        </div>
-        '''
-        m.get_root().html.add_child(folium.Element(legend_html))
+        m.get_root().html.add_child(folium.Element(_LEGEND_HTML))
 
 
 if __name__ == "__main__":
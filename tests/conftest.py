@@ -0,0 +1,8 @@
+"""
+Shared pytest setup: make the project root importable (as src.main does).
+"""
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
@@ -0,0 +1,99 @@
+"""
+Tests for DatabaseManager session handling, bulk-load statements and SQL file caching.
+"""
+import os
+
+import pytest
+from psycopg2 import sql
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from src.utils import database
+from src.utils.database import DatabaseManager, _copy_statement, _insert_statement
+
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.yaml")
+
+
+def sqlite_manager(tmp_path):
+    """DatabaseManager bound to a file-backed SQLite database."""
+    db = DatabaseManager(CONFIG_PATH)
+    db.engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    db.Session = scoped_session(
+        sessionmaker(bind=db.engine, expire_on_commit=False, autoflush=False)
+    )
+    with db.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+    return db
+
+
+def count_rows(db):
+    with db.engine.connect() as conn:
+        return conn.execute(text("SELECT count(*) FROM t")).scalar()
+
+
+def test_nested_session_is_shared_and_does_not_commit(tmp_path):
+    db = sqlite_manager(tmp_path)
+    with db.get_session() as outer:
+        outer.execute(text("INSERT INTO t VALUES (1)"))
+        with db.get_session() as inner:
+            assert inner is outer
+            inner.execute(text("INSERT INTO t VALUES (2)"))
+        # Inner exit must not end the outer transaction
+        assert outer.in_transaction()
+        assert count_rows(db) == 0
+    assert count_rows(db) == 2
+
+
+def test_outer_block_rolls_back_inner_work(tmp_path):
+    db = sqlite_manager(tmp_path)
+    with pytest.raises(RuntimeError):
+        with db.get_session() as outer:
+            with db.get_session() as inner:
+                inner.execute(text("INSERT INTO t VALUES (1)"))
+            raise RuntimeError("boom")
+    assert count_rows(db) == 0
+
+
+def test_outermost_exit_closes_session(tmp_path):
+    db = sqlite_manager(tmp_path)
+    with db.get_session() as first:
+        pass
+    assert not db.Session.registry.has()
+    with db.get_session() as second:
+        assert second is not first
+
+
+def render(composable):
+    """Render a psycopg2 sql object without a connection (identifiers quoted as PostgreSQL does)."""
+    if isinstance(composable, sql.Composed):
+        return "".join(render(part) for part in composable)
+    if isinstance(composable, sql.Identifier):
+        return ".".join('"' + s.replace('"', '""') + '"' for s in composable.strings)
+    return composable.string
+
+
+def test_insert_statement_quotes_identifiers():
+    statement = _insert_statement("residential_locations", ["node_id", "latitude"])
+    assert render(statement) == (
+        'INSERT INTO "residential_locations" ("node_id", "latitude") VALUES %s'
+    )
+
+
+def test_copy_statement_quotes_identifiers():
+    statement = _copy_statement('odd"table', ["a b"])
+    assert render(statement) == (
+        'COPY "odd""table" ("a b") FROM STDIN WITH (FORMAT csv)'
+    )
+
+
+def test_read_sql_file_rereads_same_size_edit(tmp_path, monkeypatch):
+    path = tmp_path / "schema.sql"
+    path.write_text("SELECT 1;")
+    monkeypatch.chdir(tmp_path)
+    assert database._read_sql_file("schema.sql") == "SELECT 1;"
+    # Same size, mtime only a nanosecond later: must not be served from cache
+    st = os.stat(path)
+    path.write_text("SELECT 2;")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert database._read_sql_file(str(path)) == "SELECT 2;"
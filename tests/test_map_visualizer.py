@@ -0,0 +1,132 @@
+"""
+Tests for MapVisualizer coordinate resolution and tiled point layers.
+"""
+import math
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("osmnx")
+folium = pytest.importorskip("folium")
+from folium import plugins
+
+from src.visualization import map_visualizer
+from src.visualization.map_visualizer import MapVisualizer, _tile_groups
+
+
+class FakeDB:
+    """Database stand-in that tracks whether a streamed result is open."""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.streaming = False
+    
+    @contextmanager
+    def get_session(self):
+        yield FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, db):
+        self.db = db
+    
+    def connection(self):
+        return None
+    
+    def execute(self, statement, params=None):
+        return FakeResult(self.db)
+
+
+class FakeResult:
+    def __init__(self, db):
+        self.db = db
+    
+    def partitions(self):
+        self.db.streaming = True
+        try:
+            for i in range(0, len(self.db.rows), 2):
+                yield self.db.rows[i:i + 2]
+        finally:
+            self.db.streaming = False
+
+
+class FakeGraph:
+    def __init__(self, db):
+        self.db = db
+        self.residential_buildings = []
+
+
+def test_add_residential_locations_with_empty_node_cache(monkeypatch):
+    """The node table must load before the residential stream is opened."""
+    db = FakeDB([
+        (1, 10, 39.65, 27.88),   # original coordinates
+        (2, 11, None, None),     # falls back to the snapped node
+        (3, 99, 39.60, 27.80),   # snap node missing from nodes: dropped
+    ])
+    
+    def fake_read_sql(query, con, index_col=None):
+        assert not db.streaming, "nodes loaded while a server-side cursor was open"
+        return pd.DataFrame({'node_id': [10, 11], 'node_lat': [39.0, 39.64],
+                             'node_lon': [27.0, 27.87]}).set_index(index_col)
+    
+    monkeypatch.setattr(map_visualizer.pd, 'read_sql', fake_read_sql)
+    
+    visualizer = MapVisualizer(FakeGraph(db), scorer=None)
+    assert visualizer._node_coords_df is None
+    
+    visualizer.add_residential_locations(folium.Map())
+    
+    nodes = visualizer._node_coords_df
+    assert list(nodes.index) == [10, 11]
+    
+    resolved = MapVisualizer._with_node_coords(
+        pd.DataFrame(db.rows, columns=['residential_id', 'snapped_node_id',
+                                       'original_latitude', 'original_longitude']),
+        'snapped_node_id', nodes
+    )
+    assert resolved[['lat', 'lon']].values.tolist() == [[39.65, 27.88], [39.64, 27.87]]
+
+
+def slippy_tile(lat, lon, zoom):
+    """Reference Web Mercator tile of a point (OSM wiki formula)."""
+    n = 2 ** zoom
+    lat_rad = math.radians(lat)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return x, y
+
+
+def test_tile_groups_assign_every_point_to_its_tile():
+    rng = np.random.default_rng(0)
+    coords = np.column_stack([rng.uniform(39.62, 39.68, 3000),
+                              rng.uniform(27.85, 27.92, 3000)])
+    
+    groups = _tile_groups(coords, 14)
+    
+    assert sum(len(rows) for _, rows in groups) == len(coords)
+    assert len(groups) > 1
+    for tile, rows in groups:
+        assert all(slippy_tile(lat, lon, 14) == tile for lat, lon in rows)
+    seen = np.concatenate([rows for _, rows in groups])
+    assert len(np.unique(seen, axis=0)) == len(coords)
+
+
+def test_large_unlimited_point_layer_is_split_per_tile():
+    visualizer = MapVisualizer(FakeGraph(FakeDB([])), scorer=None)
+    rng = np.random.default_rng(1)
+    coords = np.column_stack([rng.uniform(39.62, 39.68, 6000),
+                              rng.uniform(27.85, 27.92, 6000)])
+    
+    tiled = folium.Map(tiles=None)
+    visualizer._add_point_clusters(tiled, coords, "Buildings", callback="", tiled=True)
+    layers = list(tiled._children.values())
+    assert len(layers) == len(_tile_groups(coords, visualizer.zoom_level))
+    assert all(isinstance(layer, folium.FeatureGroup) for layer in layers)
+    assert layers[0].layer_name.startswith("Buildings (tile ")
+    
+    limited = folium.Map(tiles=None)
+    visualizer._add_point_clusters(limited, coords, "Buildings", callback="", tiled=False)
+    layers = list(limited._children.values())
+    assert len(layers) == 1 and isinstance(layers[0], plugins.FastMarkerCluster)
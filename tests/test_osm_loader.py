@@ -0,0 +1,177 @@
+"""
+Tests for OSMDataLoader snapping, validation, tag caching and statistics.
+"""
+import logging
+import math
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+pytest.importorskip("osmnx")
+gpd = pytest.importorskip("geopandas")
+pytest.importorskip("scipy")
+
+from shapely.geometry import Point
+
+from src.data_collection import osm_loader
+from src.data_collection.osm_loader import OSMDataLoader
+
+
+# Around Balıkesir city center
+LAT0, LON0 = 39.65, 27.88
+
+
+class FakeDB:
+    """Database stand-in serving network nodes and recording inserts."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.inserts = []
+
+    @contextmanager
+    def get_session(self):
+        yield FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, query, params=None):
+        if "FROM nodes" in str(query):
+            return iter(self.db.nodes)
+        self.db.inserts.append(params)
+        return None
+
+    def commit(self):
+        pass
+
+
+def make_loader(monkeypatch, nodes):
+    db = FakeDB(nodes)
+    monkeypatch.setattr(osm_loader, "get_db_manager", lambda config_path: db)
+    monkeypatch.setattr(osm_loader, "get_balikesir_center_polygon",
+                        lambda: Point(LON0, LAT0).buffer(0.05))
+    return OSMDataLoader(), db
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dlat, dlon = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
+    return 2 * 6371008.8 * math.asin(math.sqrt(a))
+
+
+def brute_force_nearest(lat, lon, nodes, valid_nodes, max_distance):
+    best_id, best_dist = None, math.inf
+    for node_id, node_lat, node_lon in nodes:
+        if node_id not in valid_nodes:
+            continue
+        dist = haversine(lat, lon, node_lat, node_lon)
+        if dist < best_dist:
+            best_id, best_dist = node_id, dist
+    return best_id if best_dist <= max_distance else None
+
+
+def random_nodes(rng, n, spread):
+    lats = LAT0 + rng.uniform(-spread, spread, n)
+    lons = LON0 + rng.uniform(-spread, spread, n)
+    return [(1000 + i, float(lat), float(lon)) for i, (lat, lon) in enumerate(zip(lats, lons))]
+
+
+def test_snap_matches_brute_force(monkeypatch):
+    rng = np.random.default_rng(0)
+    nodes = random_nodes(rng, 300, 0.02)
+    # Every fifth node is outside the largest component
+    valid_nodes = {node_id for node_id, _, _ in nodes if node_id % 5}
+    loader, _ = make_loader(monkeypatch, nodes)
+    loader.MAX_SNAPPING_DISTANCE = 150
+
+    lats = LAT0 + rng.uniform(-0.03, 0.03, 200)
+    lons = LON0 + rng.uniform(-0.03, 0.03, 200)
+    lats[7] = np.nan
+
+    snapped = loader._snap_to_network(lats, lons, valid_nodes)
+
+    expected = [None if np.isnan(lat) else
+                brute_force_nearest(lat, lon, nodes, valid_nodes, loader.MAX_SNAPPING_DISTANCE)
+                for lat, lon in zip(lats, lons)]
+    assert snapped == expected
+    # Both outcomes are exercised
+    assert any(node_id is None for node_id in expected[8:])
+    assert any(node_id is not None for node_id in expected)
+
+
+def test_save_locations_uses_snap_of_each_row(monkeypatch):
+    rng = np.random.default_rng(1)
+    nodes = random_nodes(rng, 100, 0.01)
+    valid_nodes = {node_id for node_id, _, _ in nodes}
+    loader, db = make_loader(monkeypatch, nodes)
+    loader.MAX_SNAPPING_DISTANCE = 10000
+    monkeypatch.setattr(loader, "_get_largest_component_nodes", lambda: valid_nodes)
+
+    # Non-sequential index: snapped ids must follow row order, not index labels
+    points = [Point(LON0 + dx, LAT0 + dy)
+              for dx, dy in rng.uniform(-0.01, 0.01, (40, 2))]
+    gdf = gpd.GeoDataFrame({"osmid": np.arange(500, 540)},
+                           geometry=points, index=rng.permutation(40) * 3 + 7)
+
+    loader.save_locations_to_db(gdf, "residential")
+
+    assert len(db.inserts) == len(gdf)
+    for params in db.inserts:
+        expected = brute_force_nearest(params["orig_lat"], params["orig_lon"], nodes,
+                                       valid_nodes, loader.MAX_SNAPPING_DISTANCE)
+        assert params["snapped_node_id"] == expected
+
+
+def test_validate_coordinates_keeps_points_inside_boundary(monkeypatch):
+    loader, _ = make_loader(monkeypatch, [])
+    boundary = loader.balikesir_config['boundary']
+    inside = Point(boundary['west'] + 0.001, boundary['south'] + 0.001)
+    on_edge = Point(boundary['east'], boundary['north'])
+    gdf = gpd.GeoDataFrame(
+        {"name": ["inside", "on_edge", "west", "north", "missing"]},
+        geometry=[inside, on_edge,
+                  Point(boundary['west'] - 0.001, LAT0),
+                  Point(LON0, boundary['north'] + 0.001),
+                  None])
+
+    valid = loader._validate_coordinates(gdf)
+
+    assert list(valid["name"]) == ["inside", "on_edge"]
+
+
+def test_tag_lookups_are_built_once(monkeypatch):
+    loader, _ = make_loader(monkeypatch, [])
+
+    restaurant = loader._get_amenity_tags_from_config('restaurant')
+    assert restaurant == {'amenity': ['restaurant', 'fast_food', 'cafe', 'food_court']}
+    assert loader._get_amenity_tags_from_config('restaurant') is restaurant
+    assert loader._get_amenity_tags_from_config('unknown') == {}
+
+    candidates = loader._get_candidate_tags_from_config()
+    assert loader._get_candidate_tags_from_config() is candidates
+    assert {'amenity', 'parking'} <= {key for group in candidates for key in group}
+
+    assert isinstance(loader.RESIDENTIAL_BUILDING_TYPES, frozenset)
+
+
+def test_statistics_are_one_log_record(monkeypatch, caplog):
+    loader, _ = make_loader(monkeypatch, [])
+    loader.stats['amenities_by_type'] = {'school': 3, 'grocery': 5}
+    loader.stats['data_quality_issues'] = ["No edges in network"]
+    caplog.set_level(logging.INFO, logger=osm_loader.logger.name)
+    caplog.clear()
+
+    loader._print_statistics(12.5)
+
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    infos = [r for r in caplog.records if r.levelno == logging.INFO]
+    assert len(warnings) == 1 and "No edges in network" in warnings[0].getMessage()
+    assert len(infos) == 1
+    report = infos[0].getMessage()
+    assert "Total loading time: 12.50 seconds" in report
+    assert report.index("  grocery: 5") < report.index("  school: 3")
+    assert "No data quality issues detected" not in report